@@ -1,10 +1,17 @@
+import collections
+import functools
+import heapq
+import mmap
 import os
+import random
 import uuid
 import json
 import time
 import threading
 import subprocess
 import shutil
+import struct
+import tempfile
 import re
 import urllib.request
 import urllib.error
@@ -12,13 +19,26 @@ import urllib.parse
 import base64
 import hashlib
 import hmac
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
-from flask import Flask, jsonify, request, send_from_directory, send_file, make_response
+from flask import (
+    Flask,
+    Request,
+    Response,
+    jsonify,
+    request,
+    send_from_directory,
+    send_file,
+    make_response,
+    stream_with_context,
+)
 
 # app.py 以脚本方式运行时，sys.path 默认在 backend/ 目录，因此使用同目录模块导入
-# docx 按需导入（仅在 /api/bundle 功能需要时）
 from openrouter_fallback import build_model_candidates, chat_with_model_fallback
 
 try:
@@ -37,6 +57,75 @@ try:
 except ImportError:
     OpenCC = None
 
+# 可选：PyAV（libav 绑定），在进程内解码音频，省掉每个任务 fork ffmpeg 的固定开销
+try:
+    import av
+except ImportError:
+    av = None
+
+# 可选：orjson（C/SIMD 实现，直接产 UTF-8 bytes），长转写的序列化比纯 Python json 快一个量级
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(s):
+    """优先 orjson，未安装时退回标准库 json。"""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """紧凑输出（请求体/SSE 帧用），返回 UTF-8 bytes。"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _json_dumps_indent_bytes(obj) -> bytes:
+    """缩进美化输出（bundle 落盘用），返回 UTF-8 bytes。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _write_json_indent(path: Path, obj) -> None:
+    """
+    把 obj 以缩进 JSON 写到 path。有 orjson 时一次 dumps 直接得到 bytes；
+    标准库路径用 iterencode 分片写盘，避免先攒出整个 JSON 字符串再整体
+    encode（对带 MB 级 transcript 的 bundle 是白占两份内存）。
+    """
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    with path.open("w", encoding="utf-8") as fp:
+        for chunk in encoder.iterencode(obj):
+            fp.write(chunk)
+
+
+def _preview(obj, n: int = 500) -> str:
+    """
+    对象的 JSON 预览（错误信息/日志用），最多 n 个字符。
+    标准库路径用 iterencode 边序列化边截断——攒够 n 就停，
+    5MB 的响应不再为了一条日志整段 dumps 再切片。
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8", "replace")[:n]
+        except TypeError:
+            pass
+    parts: list[str] = []
+    total = 0
+    for chunk in json.JSONEncoder(ensure_ascii=False).iterencode(obj):
+        parts.append(chunk)
+        total += len(chunk)
+        if total >= n:
+            break
+    return "".join(parts)[:n]
+
 
 _OPENCC_T2S = None
 
@@ -76,7 +165,9 @@ def _env(name: str, default: str) -> str:
     return v if v else default
 
 
-def _first_existing_cmd(candidates: list[str], fallback: str) -> str:
+@functools.lru_cache(maxsize=None)
+def _first_existing_cmd(candidates: tuple[str, ...], fallback: str) -> str:
+    # 每次 shutil.which 都要 stat 一遍 $PATH 下的目录，结果缓存起来
     for c in candidates:
         if shutil.which(c):
             return c
@@ -85,10 +176,31 @@ def _first_existing_cmd(candidates: list[str], fallback: str) -> str:
 
 # Homebrew 的 whisper-cpp 包通常提供 whisper-cli/whisper-server 等命令
 WHISPER_BIN = os.environ.get("WHISPER_BIN") or _first_existing_cmd(
-    ["whisper-cli", "whisper-cpp", "main"], "whisper-cli"
+    ("whisper-cli", "whisper-cpp", "main"), "whisper-cli"
 )
-FFMPEG_BIN = os.environ.get("FFMPEG_BIN") or _first_existing_cmd(["ffmpeg"], "ffmpeg")
-WHISPER_MODEL = _env("WHISPER_MODEL", str(ROOT_DIR / "models" / "ggml-small.bin"))
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN") or _first_existing_cmd(("ffmpeg",), "ffmpeg")
+FFPROBE_BIN = os.environ.get("FFPROBE_BIN") or _first_existing_cmd(("ffprobe",), "ffprobe")
+
+
+def _default_whisper_model() -> str:
+    # 优先量化模型：q5_0 体积/内存带宽约减半，小机器上推理明显更快
+    for name in ("ggml-small-q5_0.bin", "ggml-small.bin"):
+        p = ROOT_DIR / "models" / name
+        if p.exists():
+            return str(p)
+    return str(ROOT_DIR / "models" / "ggml-small.bin")
+
+
+WHISPER_MODEL = _env("WHISPER_MODEL", _default_whisper_model())
+# Metal/CUDA 后端在对应 whisper.cpp 构建里默认开启；排查 GPU 问题时 WHISPER_NO_GPU=1 关掉
+WHISPER_NO_GPU = _env("WHISPER_NO_GPU", "0").strip() in ("1", "true", "yes")
+
+# 可选：常驻 whisper-server（模型只加载一次，免去每个任务数秒的模型冷加载）
+# - WHISPER_SERVER_URL 指向已运行的 server（如 http://127.0.0.1:9000）
+# - WHISPER_SERVER=1 由本进程按需拉起一个（whisper-cpp 包自带 whisper-server）
+WHISPER_SERVER_URL = _env("WHISPER_SERVER_URL", "").strip()
+WHISPER_SERVER = _env("WHISPER_SERVER", "0").strip() in ("1", "true", "yes")
+WHISPER_SERVER_PORT = int(_env("WHISPER_SERVER_PORT", "9000"))
 WHISPER_LANGUAGE = _env("WHISPER_LANGUAGE", "zh")
 WHISPER_THREADS = int(_env("WHISPER_THREADS", str(min(8, os.cpu_count() or 4))))
 
@@ -96,12 +208,169 @@ WHISPER_THREADS = int(_env("WHISPER_THREADS", str(min(8, os.cpu_count() or 4))))
 MAX_CONTENT_LENGTH_MB = int(_env("MAX_CONTENT_LENGTH_MB", "1024"))  # 1GB
 
 
+@functools.lru_cache(maxsize=8)
+def _which(name: str) -> Optional[str]:
+    """缓存 PATH 扫描结果：/api/health 每次命中都做一遍目录遍历没有意义。"""
+    return shutil.which(name)
+
+
+_model_exists_cached = False
+
+
+def _model_exists() -> bool:
+    """
+    模型文件存在性探测。只缓存“存在”的结论：模型可能在服务启动后才下载，
+    缺失时每次都重新 stat，一旦存在就不再打磁盘。
+    """
+    global _model_exists_cached
+    if _model_exists_cached:
+        return True
+    _model_exists_cached = Path(WHISPER_MODEL).exists()
+    return _model_exists_cached
+
+
+class _DirectUploadRequest(Request):
+    """
+    multipart 文件部分直接写进 UPLOAD_DIR 的具名临时文件。
+    Werkzeug 默认经 SpooledTemporaryFile（内存 spool + /tmp 落盘 + save 再拷一次）；
+    这里上传只写一遍磁盘，保存时还能直接 rename 接管（见 _save_upload）。
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # buffering=0：multipart 解析器本来就按大块写入，再套一层 8KB 的
+        # BufferedWriter 只是多一次用户态拷贝
+        return tempfile.NamedTemporaryFile("wb+", buffering=0, dir=str(UPLOAD_DIR), prefix="upload-", suffix=".part", delete=False)
+
+
 app = Flask(__name__, static_folder=None)
+app.request_class = _DirectUploadRequest
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH_MB * 1024 * 1024
+# send_file 默认经 wsgi.file_wrapper 下发（gunicorn 等会走 sendfile 零拷贝）。
+# 前面挂了 nginx/Apache 时可设 USE_X_SENDFILE=1，让 Flask 只回 X-Sendfile
+# 头、由前端服务器直接发文件
+app.use_x_sendfile = _env("USE_X_SENDFILE", "0") == "1"
+
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class _OrjsonProvider(JSONProvider):
+        """让 jsonify/request.get_json 走 orjson（/api/jobs 轮询与长文本响应的热路径）。"""
+
+        def dumps(self, obj, **kwargs) -> str:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = _OrjsonProvider(app)
+
+
+@dataclass(slots=True)
+class Job:
+    """
+    固定槽位的任务记录。__slots__ 去掉 per-instance __dict__，
+    字段读取是定偏移访问；轮询一个任务不再在堆上跳七八个零散小 dict。
+    """
+
+    status: str = "queued"
+    message: str = ""
+    progress: Optional[int] = None
+    text: str = ""  # 兼容槽位：正文以 text_path 指向的文件为准
+    text_path: str = ""
+    log: str = ""
+    log_tail: collections.deque = field(default_factory=lambda: collections.deque(maxlen=80))
+    created_at: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    transcribe_duration: float = 0.0
+    original_filename: str = ""
+    future: Optional[Future] = None
+    # SSE 等待者挂在这个 Event 上；每次更新换新 Event 并 set 旧的（边沿触发）
+    event: threading.Event = field(default_factory=threading.Event)
 
 
 _jobs_lock = threading.Lock()
-_jobs: dict[str, dict] = {}
+_jobs: dict[str, Job] = {}
+
+# 转写并发上限：whisper 本身就吃 WHISPER_THREADS 个核，一个上传一个线程会把机器打爆。
+# 超出并发的任务留在池子队列里，状态保持 queued，直到有 worker 接手。
+JOB_CONCURRENCY = int(_env("JOB_CONCURRENCY", "1"))
+_job_executor = ThreadPoolExecutor(max_workers=JOB_CONCURRENCY, thread_name_prefix="transcribe")
+
+# 云端（API 模式）任务全程只是上传 + 退避轮询，纯 IO 等待，不该占用
+# 按 CPU 算力配的本地转写槽位；单独给一个宽松的池子，几十路并发也就
+# 是几十个基本在 sleep 的线程
+API_JOB_CONCURRENCY = int(_env("API_JOB_CONCURRENCY", "16"))
+_api_job_executor = ThreadPoolExecutor(max_workers=API_JOB_CONCURRENCY, thread_name_prefix="transcribe-api")
+
+# 任务与产物的保留时长（分钟）：到期从内存剔除，data/work 与 uploads 的文件一并删除
+JOB_TTL_MIN = int(_env("JOB_TTL_MIN", "60"))
+
+
+def _sweep_jobs_once(now: Optional[float] = None) -> list[str]:
+    """
+    清理一轮：已结束（done/error）且超过 TTL 的任务出内存，磁盘产物删除。
+    运行中/排队中的任务不动。返回被清理的 job_id 列表（便于测试）。
+    """
+    now = now if now is not None else time.time()
+    ttl = JOB_TTL_MIN * 60
+    with _jobs_lock:
+        dead = [
+            jid
+            for jid, j in _jobs.items()
+            if j.status in ("done", "error") and (now - (j.finished_at or j.created_at or now)) > ttl
+        ]
+        for jid in dead:
+            _jobs.pop(jid, None)
+    for jid in dead:
+        for d in (WORK_DIR, UPLOAD_DIR):
+            for p in d.glob(f"{jid}*"):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+        bundle = WORK_DIR / f"bundle-{jid}.json"
+        try:
+            bundle.unlink()
+        except OSError:
+            pass
+    # 请求中断可能留下未被接管的上传临时文件，过期一并清掉
+    for p in UPLOAD_DIR.glob("upload-*.part"):
+        try:
+            if now - p.stat().st_mtime > ttl:
+                p.unlink()
+        except OSError:
+            pass
+    return dead
+
+
+def _sweep_jobs_loop():
+    while True:
+        time.sleep(60)
+        try:
+            _sweep_jobs_once()
+        except Exception:
+            pass
+
+
+threading.Thread(target=_sweep_jobs_loop, name="job-sweeper", daemon=True).start()
+
+
+# 模块级预编译（注意用 raw 字符串：之前在函数内写成 "\\s"/"\\d"，
+# 实际匹配的是字面反斜杠，进度解析一直是死代码）
+_PROGRESS_RE = re.compile(r"progress\s*=\s*(\d+)%", re.IGNORECASE)
+_ANY_PCT_RE = re.compile(r"(\d{1,3})%")
+# docx 常见编号：1. / 1、/ 1) / （1）/ 1）/ Q1 / Q1:
+_DOCX_QUESTION_RE = re.compile(r"^(?:Q\s*)?(\d{1,3})\s*(?:[\.、:：\)）]|（\1）)\s*(.+)$", re.IGNORECASE)
+_CODE_FENCE_OPEN_RE = re.compile(r"^```[a-zA-Z0-9_-]*\s*")
+_CODE_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+_SAFE_BASENAME_RE = re.compile(r"[^\w\u4e00-\u9fff\-]+")
+
+
+# _load_local_config 的 mtime 缓存：配置几乎不变，但每个请求都要读 key，
+# 没必要每次都 open+json.loads，一次 stat() 足够判断是否需要重读
+_cfg_cache: dict = {"mtime": -1, "value": None}
+_cfg_cache_lock = threading.Lock()
 
 
 def _load_local_config() -> dict:
@@ -109,11 +378,20 @@ def _load_local_config() -> dict:
     读取本地 config.json（被 .gitignore 忽略）或环境变量。
     - OPENROUTER_API_KEY, OPENROUTER_MODEL, OPENROUTER_MAX_TOKENS
     - STT_API_URL, STT_API_KEY, STT_API_METHOD (stt_api_method: "POST"/"GET")
+    结果按 config.json 的 mtime 缓存，文件变动（或出现/删除）后自动重读。
     """
+    try:
+        mtime = CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+    with _cfg_cache_lock:
+        if mtime == _cfg_cache["mtime"] and _cfg_cache["value"] is not None:
+            return _cfg_cache["value"]
+
     cfg: dict = {}
     try:
-        if CONFIG_PATH.exists():
-            cfg = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+        # 直接读 bytes 走 _json_loads（有 orjson 时更快），省掉 exists() 的一次 stat
+        cfg = _json_loads(CONFIG_PATH.read_bytes())
     except Exception:
         cfg = {}
 
@@ -130,10 +408,9 @@ def _load_local_config() -> dict:
     stt_api_method = (cfg.get("stt_api_method") if isinstance(cfg, dict) else None) or os.environ.get("STT_API_METHOD") or "POST"
     stt_api_type = (cfg.get("stt_api_type") if isinstance(cfg, dict) else None) or os.environ.get("STT_API_TYPE") or ""
     stt_api_appid = (cfg.get("stt_api_appid") if isinstance(cfg, dict) else None) or os.environ.get("STT_API_APPID") or ""
-    stt_api_key = (cfg.get("stt_api_key") if isinstance(cfg, dict) else None) or os.environ.get("STT_API_KEY") or ""
     stt_api_secret_key = (cfg.get("stt_api_secret_key") if isinstance(cfg, dict) else None) or os.environ.get("STT_API_SECRET_KEY") or ""
 
-    return {
+    result = {
         "openrouter_api_key": (api_key or "").strip(),
         "openrouter_model": (model or "").strip(),
         # 可选：多个模型候选（数组）。如果不配，仍使用 openrouter_model 或 openrouter-models.js
@@ -146,6 +423,10 @@ def _load_local_config() -> dict:
         "stt_api_appid": (stt_api_appid or "").strip(),
         "stt_api_secret_key": (stt_api_secret_key or "").strip(),
     }
+    with _cfg_cache_lock:
+        _cfg_cache["mtime"] = mtime
+        _cfg_cache["value"] = result
+    return result
 
 
 def _strip_code_fence(s: str) -> str:
@@ -155,8 +436,8 @@ def _strip_code_fence(s: str) -> str:
     t = (s or "").strip()
     if t.startswith("```"):
         # ```json\n...\n``` 或 ```\n...\n```
-        t = re.sub(r"^```[a-zA-Z0-9_-]*\s*", "", t)
-        t = re.sub(r"\s*```$", "", t)
+        t = _CODE_FENCE_OPEN_RE.sub("", t)
+        t = _CODE_FENCE_CLOSE_RE.sub("", t)
         t = t.strip()
     return t
 
@@ -165,39 +446,139 @@ def _safe_basename(name: str) -> str:
     生成一个适合做文件名的 basename（尽量保留中文/英文/数字/_/-，其他替换为 _）
     """
     base = Path(name).stem.strip() or "audio"
-    base = re.sub(r"[^\w\u4e00-\u9fff\-]+", "_", base)
+    base = _SAFE_BASENAME_RE.sub("_", base)
     return base[:80] or "audio"
 
 
-def _set_job(job_id: str, **kwargs):
-    with _jobs_lock:
-        job = _jobs.get(job_id, {})
-        job.update(kwargs)
-        _jobs[job_id] = job
+def _save_upload(f, dst_path: Path):
+    """
+    上传文件落盘。内容已经在 UPLOAD_DIR 的临时文件里（_DirectUploadRequest）
+    时直接 rename 接管，零拷贝；否则源流有真实 fd 先试 os.sendfile，
+    再退 1MiB 缓冲的 copyfileobj（werkzeug 默认 16KB 块，1GB 要 ~65000 次循环）。
+    """
+    stream = f.stream
+    name = getattr(stream, "name", None)
+    if isinstance(name, str):
+        src = Path(name)
+        if src.exists() and src.parent == dst_path.parent:
+            try:
+                stream.flush()
+            except (AttributeError, OSError):
+                pass
+            os.replace(name, dst_path)
+            return
+    with open(dst_path, "wb") as dst:
+        # SpooledTemporaryFile 未滚到磁盘时别碰 fileno()：那会强制落盘，
+        # 小文件直接从内存 copyfileobj 反而更快
+        if isinstance(stream, tempfile.SpooledTemporaryFile) and not getattr(stream, "_rolled", True):
+            src_fd = None
+        else:
+            try:
+                src_fd = stream.fileno()
+            except (AttributeError, OSError):
+                src_fd = None
 
+        if src_fd is not None:
+            try:
+                offset = 0
+                while True:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, 1 << 24)
+                    if sent == 0:
+                        return
+                    offset += sent
+            except OSError:
+                # 源不支持 sendfile（如内存假流）时回退普通拷贝
+                dst.seek(0)
+                dst.truncate()
+                try:
+                    stream.seek(0)
+                except (AttributeError, OSError):
+                    pass
 
-def _get_job(job_id: str) -> Optional[dict]:
-    with _jobs_lock:
-        return _jobs.get(job_id)
+        shutil.copyfileobj(stream, dst, length=1 << 20)
+
+
+def _discard_upload_stream(f):
+    """丢弃 _DirectUploadRequest 落盘的临时文件（内容已另行消费时调用）。"""
+    name = getattr(f.stream, "name", None)
+    if isinstance(name, str):
+        try:
+            os.unlink(name)
+        except OSError:
+            pass
 
 
-def _run(cmd: list[str], cwd: Optional[Path] = None) -> tuple[int, str]:
+def _set_job(job_id: str, **kwargs):
+    # log_tail 固定为 deque(maxlen=80)：追加 O(1) 且自动截断，不再整表替换/切片
+    lines = kwargs.pop("log_tail", None)
+    job = _jobs.get(job_id)
+    if job is None:
+        # 只有插入新 job 需要锁（防并发双建）；已有 job 的属性写在 GIL 下
+        # 本身是原子的，读端（状态轮询）拿到的永远是完整的旧值或新值
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            if job is None:
+                job = Job()
+                _jobs[job_id] = job
+    for k, v in kwargs.items():
+        setattr(job, k, v)
+    if lines:
+        job.log_tail.extend(lines)
+    _wake_job_waiters(job)
+
+
+def _wake_job_waiters(job: "Job"):
+    # 先换新 Event 再 set 旧的：被唤醒的等待者重新取 job.event 时拿到的一定是新的
+    old = job.event
+    job.event = threading.Event()
+    old.set()
+
+
+def _publish_progress(
+    job_id: str,
+    progress: Optional[int] = None,
+    message: Optional[str] = None,
+    line: Optional[str] = None,
+):
+    """
+    进度热路径（每条 whisper 输出调用一次）：单生产者（读子进程输出的线程）
+    + 单消费者（HTTP 轮询）。dict 槽位写入与 deque.append 在 GIL 下都是
+    原子操作，这里不取 _jobs_lock，轮询端读取也不会和它争锁。
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    if line:
+        job.log_tail.append(line)
+    if progress is not None:
+        job.progress = progress
+    if message is not None:
+        job.message = message
+    _wake_job_waiters(job)
+
+
+def _get_job(job_id: str) -> Optional[Job]:
+    # 读路径免锁：dict 查找在 GIL 下原子，进度槽位由单生产者写入
+    return _jobs.get(job_id)
+
+
+def _run(cmd: list[str], cwd: Optional[Path] = None, capture: bool = True) -> tuple[int, str]:
+    # capture=False：调用方只看返回码（如 ffmpeg 转码），长任务的逐帧进度
+    # 日志能有几 MB，没必要整段攒在内存里——只留尾部够诊断失败即可
+    if not capture:
+        return _run_stream(cmd, cwd=cwd, max_capture_lines=200)
+    # 不需要增量输出，全缓冲 + 一次 communicate 即可，省掉逐行读的开销
     try:
-        p = subprocess.Popen(
+        cp = subprocess.run(
             cmd,
             cwd=str(cwd) if cwd else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
-            bufsize=1,
-            universal_newlines=True,
+            encoding="utf-8",
+            errors="replace",
         )
-        out_lines: list[str] = []
-        assert p.stdout is not None
-        for line in p.stdout:
-            out_lines.append(line)
-        rc = p.wait()
-        return rc, "".join(out_lines)
+        return cp.returncode, cp.stdout or ""
     except FileNotFoundError as e:
         return 127, f"找不到命令：{e}\ncmd={cmd}\n"
 
@@ -219,95 +600,293 @@ def _run_stream(
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
-            bufsize=1,
-            universal_newlines=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1 << 16,
         )
     except FileNotFoundError as e:
         return 127, f"找不到命令：{e}\ncmd={cmd}\n"
 
-    out_lines: list[str] = []
+    # deque(maxlen) 追加即自动淘汰，不像列表切片那样每次溢出都整段拷贝
+    out_lines: collections.deque[str] = collections.deque(maxlen=max_capture_lines)
     assert p.stdout is not None
-    for line in p.stdout:
+    # 按 64KB 块读再在 Python 层切行：比逐行迭代少一个数量级的 read() 调用
+    buf = ""
+    while True:
+        chunk = p.stdout.read(1 << 16)
+        if not chunk:
+            break
+        buf += chunk
+        while "\n" in buf:
+            line, buf = buf.split("\n", 1)
+            line += "\n"
+            if on_line:
+                try:
+                    on_line(line)
+                except Exception:
+                    pass
+            out_lines.append(line)
+    if buf:
         if on_line:
             try:
-                on_line(line)
+                on_line(buf)
             except Exception:
                 pass
-        out_lines.append(line)
-        if len(out_lines) > max_capture_lines:
-            out_lines = out_lines[-max_capture_lines:]
+        out_lines.append(buf)
     rc = p.wait()
     return rc, "".join(out_lines)
 
 
 def _get_audio_duration(audio_path: Path) -> int:
     """
-    获取音频文件的时长（毫秒）
-    使用 ffprobe 或 ffmpeg 获取时长
+    获取音频文件的时长（毫秒）。
+    只让 ffprobe 读容器头（JSON 输出，format 或首个音频流的 duration），
+    失败直接用默认值——以前退回 `ffmpeg -f null -` 会把整个文件解码一遍，
+    就为拿一个容器里本来就写着的数字。
     """
     try:
-        # 尝试使用 ffprobe
-        ffprobe_bin = os.environ.get("FFPROBE_BIN") or _first_existing_cmd(["ffprobe"], "ffprobe")
         cmd = [
-            ffprobe_bin,
+            FFPROBE_BIN,
             "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
+            "-select_streams", "a:0",
+            "-show_entries", "format=duration:stream=duration",
+            "-of", "json",
             str(audio_path)
         ]
         rc, out = _run(cmd)
         if rc == 0:
-            duration_seconds = float(out.strip())
-            return int(duration_seconds * 1000)  # 转换为毫秒
+            info = _json_loads(out)
+            duration = (info.get("format") or {}).get("duration")
+            if not duration:
+                streams = info.get("streams") or []
+                duration = streams[0].get("duration") if streams else None
+            if duration:
+                return int(float(duration) * 1000)  # 转换为毫秒
     except Exception:
         pass
-    
-    # 如果 ffprobe 失败，尝试使用 ffmpeg
-    try:
-        cmd = [
-            FFMPEG_BIN,
-            "-i", str(audio_path),
-            "-f", "null",
-            "-"
-        ]
-        rc, out = _run(cmd)
-        # ffmpeg 输出中包含 Duration: HH:MM:SS.mmm
-        import re
-        match = re.search(r'Duration: (\d+):(\d+):(\d+\.\d+)', out)
-        if match:
-            hours = int(match.group(1))
-            minutes = int(match.group(2))
-            seconds = float(match.group(3))
-            duration_seconds = hours * 3600 + minutes * 60 + seconds
-            return int(duration_seconds * 1000)  # 转换为毫秒
-    except Exception:
-        pass
-    
-    # 如果都失败，返回默认值（200秒 = 200000毫秒）
+
+    # 失败时返回默认值（200秒 = 200000毫秒）
     return 200000
 
 
+def _is_whisper_ready_wav(path: Path) -> bool:
+    """
+    探测是否已经是 16kHz 单声道 16-bit PCM 的 WAV（whisper 可直接吃）。
+    只读文件头：RIFF/WAVE 标识 + 遍历 chunk 找 fmt，不碰音频数据。
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+            if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+                return False
+            # fmt 一般是第一个 chunk，容忍前面混几个别的（如 JUNK/LIST）
+            for _ in range(8):
+                hdr = f.read(8)
+                if len(hdr) < 8:
+                    return False
+                cid, csize = struct.unpack("<4sI", hdr)
+                if cid == b"fmt ":
+                    fmt = f.read(16)
+                    if len(fmt) < 16:
+                        return False
+                    audio_fmt, channels, rate, _byte_rate, _block_align, bits = struct.unpack("<HHIIHH", fmt)
+                    if audio_fmt == 0xFFFE and csize >= 40:
+                        # WAVE_FORMAT_EXTENSIBLE：部分编码器对普通 PCM 也会用，
+                        # 看 SubFormat GUID 前 4 字节是否是 PCM（0x0001）
+                        ext = f.read(24)
+                        if len(ext) == 24 and ext[8:12] == b"\x01\x00\x00\x00":
+                            audio_fmt = 1
+                    return audio_fmt == 1 and channels == 1 and rate == 16000 and bits == 16
+                f.seek(csize + (csize & 1), 1)
+    except OSError:
+        return False
+    return False
+
+
 def _to_wav_16k_mono(src: Path, dst: Path) -> tuple[bool, str]:
-    cmd = [
+    # 源已是 16k 单声道 s16 WAV 时不必重编码：同目录硬链接（零拷贝），
+    # 跨文件系统退回普通拷贝
+    if _is_whisper_ready_wav(src):
+        try:
+            dst.unlink(missing_ok=True)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copyfile(src, dst)
+            return True, ""
+        except OSError as e:
+            return False, f"复制失败：{e}\n"
+
+    def _cmd(soxr: bool) -> list[str]:
+        c = [FFMPEG_BIN, "-y", "-i", str(src), "-vn", "-map_metadata", "-1", "-threads", "0"]
+        if soxr:
+            # soxr 重采样器是 SIMD 实现，比默认 swr 快不少
+            c += ["-af", "aresample=resampler=soxr"]
+        c += ["-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", str(dst)]
+        return c
+
+    rc, out = _run(_cmd(soxr=True), capture=False)
+    if rc != 0:
+        # 精简编译的 ffmpeg 可能没带 libsoxr，退回默认重采样器再试一次
+        rc, out = _run(_cmd(soxr=False), capture=False)
+    return rc == 0, out
+
+
+def _wav_stream_header(sample_rate: int = 16000, channels: int = 1, bits: int = 16) -> bytes:
+    """
+    流式 WAV 头（长度未知时 RIFF/data 大小填 0xFFFFFFFF，与 ffmpeg 管道输出同款处理）。
+    """
+    byte_rate = sample_rate * channels * bits // 8
+    block_align = channels * bits // 8
+    return (
+        b"RIFF"
+        + struct.pack("<I", 0xFFFFFFFF)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, block_align, bits)
+        + b"data"
+        + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _decode_to_pcm(src: Path):
+    """
+    用 PyAV 在进程内把音频解码为 16kHz 单声道 s16 PCM，逐块产出 bytes。
+    相比 fork ffmpeg，省掉每个任务的进程启动/动态链接/编解码器注册开销。
+    """
+    container = av.open(str(src))
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    try:
+        for frame in container.decode(audio=0):
+            out = resampler.resample(frame)
+            # 新版 PyAV 返回 list[AudioFrame]，旧版返回单个帧
+            for of in out if isinstance(out, list) else ([out] if out is not None else []):
+                yield bytes(of.planes[0])
+        # 冲掉重采样器里缓存的尾部样本
+        try:
+            tail = resampler.resample(None)
+            for of in tail if isinstance(tail, list) else ([tail] if tail is not None else []):
+                yield bytes(of.planes[0])
+        except Exception:
+            pass
+    finally:
+        container.close()
+
+
+_whisper_server_proc: Optional[subprocess.Popen] = None
+_whisper_server_lock = threading.Lock()
+
+
+def _ensure_whisper_server() -> str:
+    """
+    返回可用的 whisper-server 地址；WHISPER_SERVER=1 时按需拉起常驻进程。
+    未启用/拉不起来返回空串，调用方回退到 whisper-cli。
+    """
+    global _whisper_server_proc
+    if WHISPER_SERVER_URL:
+        return WHISPER_SERVER_URL
+    if not WHISPER_SERVER or requests is None:
+        return ""
+    with _whisper_server_lock:
+        if _whisper_server_proc is None or _whisper_server_proc.poll() is not None:
+            server_bin = os.environ.get("WHISPER_SERVER_BIN") or _first_existing_cmd(
+                ("whisper-server",), "whisper-server"
+            )
+            cmd = [
+                server_bin,
+                "-m",
+                WHISPER_MODEL,
+                "-t",
+                str(WHISPER_THREADS),
+                "-l",
+                WHISPER_LANGUAGE,
+                "--port",
+                str(WHISPER_SERVER_PORT),
+            ]
+            try:
+                _whisper_server_proc = subprocess.Popen(
+                    cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+            except FileNotFoundError:
+                return ""
+            # 给模型加载留点时间；没就绪的话首个请求会失败并回退 CLI
+            time.sleep(2)
+    return f"http://127.0.0.1:{WHISPER_SERVER_PORT}"
+
+
+def _whisper_transcribe_server(src: Path, out_prefix: Path, base_url: str) -> tuple[bool, str]:
+    """
+    通过常驻 whisper-server 转写：模型不用每个任务重新加载。
+    结果写到 out_prefix.txt，和 CLI 路径的产物一致。
+    """
+    job_id = str(out_prefix.name)
+    if _is_whisper_ready_wav(src):
+        wav_path = src
+        cleanup = False
+    else:
+        wav_path = WORK_DIR / f"{job_id}-server.wav"
+        ok, log = _to_wav_16k_mono(src, wav_path)
+        if not ok:
+            return False, log
+        cleanup = True
+
+    try:
+        _publish_progress(job_id, message="转写中（whisper-server）…")
+        with open(wav_path, "rb") as fh:
+            resp = requests.post(
+                f"{base_url}/inference",
+                files={"file": (wav_path.name, fh, "audio/wav")},
+                data={"language": WHISPER_LANGUAGE, "response_format": "text"},
+                timeout=3600,
+            )
+        if resp.status_code != 200:
+            return False, f"whisper-server HTTP {resp.status_code}: {resp.text[:500]}"
+        Path(str(out_prefix) + ".txt").write_text(resp.text, encoding="utf-8")
+        return True, ""
+    except requests.exceptions.RequestException as e:
+        return False, f"whisper-server 请求失败: {e}"
+    finally:
+        if cleanup:
+            try:
+                wav_path.unlink()
+            except OSError:
+                pass
+
+
+def _whisper_transcribe(src: Path, out_prefix: Path) -> tuple[bool, str]:
+    """
+    将音频解码为 16kHz 单声道 PCM，通过管道直接喂给 whisper.cpp（-f -）。
+    优先用 PyAV 在进程内解码（免 fork ffmpeg）；未安装 av 时退回 ffmpeg 管道。
+    两条路径都不在 data/work 落整段 WAV，解码与推理在管道上重叠。
+    输入本来就是 16k 单声道 PCM WAV 时完全跳过解码，whisper 直接读文件。
+    配置了常驻 whisper-server 时优先走 HTTP（模型常驻内存），失败回退 CLI。
+    """
+    server_url = _ensure_whisper_server()
+    if server_url:
+        ok, out = _whisper_transcribe_server(src, out_prefix, server_url)
+        if ok:
+            return True, out
+        # server 不可用/出错：继续走 CLI 路径兜底
+
+    direct = _is_whisper_ready_wav(src)
+    ffmpeg_cmd = [
         FFMPEG_BIN,
-        "-y",
+        "-v",
+        "error",
         "-i",
         str(src),
-        "-ar",
-        "16000",
         "-ac",
         "1",
+        "-ar",
+        "16000",
         "-c:a",
         "pcm_s16le",
-        str(dst),
+        # 流式输出带 WAV 头（whisper.cpp 从 stdin 读取时按 WAV 解析）
+        "-f",
+        "wav",
+        "-",
     ]
-    rc, out = _run(cmd)
-    return rc == 0, out
-
-
-def _whisper_transcribe(wav_path: Path, out_prefix: Path) -> tuple[bool, str]:
-    # whisper.cpp 常见参数：-m 模型 -f 输入 -l 语言 -otxt 输出文本 -of 输出前缀
-    cmd = [
+    # whisper.cpp 常见参数：-m 模型 -f 输入（- 表示 stdin）-l 语言 -otxt 输出文本 -of 输出前缀
+    whisper_cmd = [
         WHISPER_BIN,
         "-t",
         str(WHISPER_THREADS),
@@ -316,29 +895,26 @@ def _whisper_transcribe(wav_path: Path, out_prefix: Path) -> tuple[bool, str]:
         "-l",
         WHISPER_LANGUAGE,
         "-f",
-        str(wav_path),
+        str(src) if direct else "-",
         "-pp",
         "-otxt",
         "-of",
         str(out_prefix),
     ]
+    if WHISPER_NO_GPU:
+        whisper_cmd.append("-ng")
     # 运行中实时抓进度：尽量兼容不同输出格式
-    progress_re = re.compile(r"progress\\s*=\\s*(\\d+)%", re.IGNORECASE)
-    any_percent_re = re.compile(r"(\\d{1,3})%")
-    log_tail: list[str] = []
     last_progress: Optional[int] = None
+    last_pub_pct: Optional[int] = None
+    last_pub_ts = 0.0
 
     def on_line(line: str):
-        nonlocal last_progress, log_tail
+        nonlocal last_progress, last_pub_pct, last_pub_ts
         s = line.strip()
         if not s:
             return
 
-        log_tail.append(s)
-        if len(log_tail) > 80:
-            log_tail = log_tail[-80:]
-
-        m = progress_re.search(s)
+        m = _PROGRESS_RE.search(s)
         if m:
             try:
                 last_progress = int(m.group(1))
@@ -346,7 +922,7 @@ def _whisper_transcribe(wav_path: Path, out_prefix: Path) -> tuple[bool, str]:
                 pass
         else:
             # 兜底：行里出现 xx% 就取一个
-            m2 = any_percent_re.search(s)
+            m2 = _ANY_PCT_RE.search(s)
             if m2:
                 try:
                     v = int(m2.group(1))
@@ -355,33 +931,190 @@ def _whisper_transcribe(wav_path: Path, out_prefix: Path) -> tuple[bool, str]:
                 except Exception:
                     pass
 
+        # 日志尾巴与进度发布解耦：每行都进 log_tail（deque 追加很便宜，
+        # 不唤醒等待者），进度/消息则合并发布——只有百分比变化或距上次
+        # 发布超过 ~500ms 才更新。-pp 模式下 whisper 每秒可能刷几百行，
+        # 逐行发布纯属锁/事件churn
+        job = _jobs.get(str(out_prefix.name))
+        if job is not None:
+            job.log_tail.append(s)
+
+        now = time.monotonic()
+        if last_progress == last_pub_pct and (now - last_pub_ts) <= 0.5:
+            return
+        last_pub_pct = last_progress
+        last_pub_ts = now
+
         # out_prefix.name == job_id（调用者传入 WORK_DIR/job_id）
         if last_progress is not None:
-            _set_job(
+            _publish_progress(
                 str(out_prefix.name),
                 progress=last_progress,
                 message=f"转写中… {last_progress}%",
-                log_tail=log_tail,
             )
         else:
-            _set_job(str(out_prefix.name), log_tail=log_tail)
+            _publish_progress(str(out_prefix.name))
 
-    rc, out = _run_stream(cmd, cwd=ROOT_DIR, on_line=on_line)
-    return rc == 0, out
+    ff: Optional[subprocess.Popen] = None
+    if av is None and not direct:
+        # 退化路径：未安装 PyAV 时仍 fork ffmpeg 做解码
+        try:
+            ff = subprocess.Popen(
+                ffmpeg_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError as e:
+            return False, f"找不到命令：{e}\ncmd={ffmpeg_cmd}\n"
+
+    try:
+        # 二进制 + 无缓冲：按块读 stdout，自己切记录。text=True 的逐行迭代
+        # 既有每字符解码/找 \n 的纯 Python 开销，也完全看不到 \r 结尾的进度刷新
+        wp = subprocess.Popen(
+            whisper_cmd,
+            cwd=str(ROOT_DIR),
+            stdin=(
+                ff.stdout
+                if ff is not None
+                else (subprocess.DEVNULL if direct else subprocess.PIPE)
+            ),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+        )
+    except FileNotFoundError as e:
+        if ff is not None:
+            ff.kill()
+            ff.wait()
+        return False, f"找不到命令：{e}\ncmd={whisper_cmd}\n"
+
+    ffmpeg_err: list[str] = []
+    decode_err: list[str] = []
+    side_t: Optional[threading.Thread] = None
+
+    if ff is not None:
+        # 父进程关闭自己这份写端，whisper 退出后 ffmpeg 才能收到管道关闭
+        assert ff.stdout is not None
+        ff.stdout.close()
+
+        # ffmpeg 的 stderr 用线程排空，避免两个管道互相堵死
+        def drain_ffmpeg_stderr():
+            assert ff.stderr is not None
+            try:
+                ffmpeg_err.append(ff.stderr.read().decode("utf-8", errors="ignore"))
+            except Exception:
+                pass
+
+        side_t = threading.Thread(target=drain_ffmpeg_stderr, daemon=True)
+    elif not direct:
+        # PyAV 进程内解码，喂给 whisper 的 stdin
+        def feed_pcm():
+            assert wp.stdin is not None
+            try:
+                wp.stdin.write(_wav_stream_header())
+                for chunk in _decode_to_pcm(src):
+                    wp.stdin.write(chunk)
+            except BrokenPipeError:
+                pass
+            except Exception as e:
+                decode_err.append(f"PyAV 解码失败：{e}")
+            finally:
+                try:
+                    wp.stdin.close()
+                except Exception:
+                    pass
+
+        side_t = threading.Thread(target=feed_pcm, daemon=True)
+
+    if side_t is not None:
+        side_t.start()
+
+    out_lines: list[str] = []
+
+    def handle_record(record: bytes):
+        s = record.decode("utf-8", errors="replace")
+        try:
+            on_line(s)
+        except Exception:
+            pass
+        out_lines.append(s)
+        if len(out_lines) > 5000:
+            del out_lines[:-5000]
+
+    assert wp.stdout is not None
+    buf = bytearray()
+    while True:
+        chunk = wp.stdout.read(4096)
+        if not chunk:
+            break
+        buf += chunk
+        # 只切完整记录（\n 或 \r 结尾），残段留在缓冲里等下一块
+        cut = max(buf.rfind(b"\n"), buf.rfind(b"\r"))
+        if cut < 0:
+            continue
+        complete = bytes(buf[: cut + 1])
+        del buf[: cut + 1]
+        for seg in complete.replace(b"\r", b"\n").split(b"\n"):
+            if seg:
+                handle_record(seg)
+    if buf:
+        handle_record(bytes(buf))
+
+    rc = wp.wait()
+    ff_rc = ff.wait() if ff is not None else 0
+    if side_t is not None:
+        side_t.join(timeout=5)
+
+    out = "\n".join(out_lines)
+    if ff_rc != 0:
+        out += f"\n[ffmpeg 退出码 {ff_rc}]\n" + "".join(ffmpeg_err)
+    if decode_err:
+        out += "\n" + "\n".join(decode_err)
+    return rc == 0 and ff_rc == 0 and not decode_err, out
+
+
+_xf_session = None
 
 
-def _xunfei_get_signa(appid: str, secret_key: str, ts: str) -> str:
+def _get_xf_session():
+    """
+    讯飞接口共用的 requests.Session（懒初始化）：上传 + 最多上百次结果轮询
+    复用同一条 keep-alive 连接，省掉每次轮询重建 TCP+TLS 的 1-2 个 RTT。
+    未安装 requests 时返回 None。
+    """
+    global _xf_session
+    if requests is None:
+        return None
+    if _xf_session is None:
+        s = requests.Session()
+        s.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _xf_session = s
+    return _xf_session
+
+
+@functools.lru_cache(maxsize=8)
+def _xunfei_hmac_base(secret_key: bytes) -> "hmac.HMAC":
+    """按密钥缓存做完 key 初始化的空 HMAC-SHA1，轮询时 copy() 复用。"""
+    return hmac.new(secret_key, digestmod=hashlib.sha1)
+
+
+def _xunfei_get_signa(appid, secret_key, ts: str) -> str:
     """
     科大讯飞旧版 API 签名生成（raasr.xfyun.cn）
-    根据用户提供的 demo 代码实现
+    根据用户提供的 demo 代码实现。
+    appid/secret_key 接受 str 或预编码好的 bytes——轮询循环里编码一次
+    复用即可，hashlib/hmac 直接吃 bytes 也省掉每次的 str 转换。
+    HMAC 的 key 初始化（两次块填充）也只做一次，每次签名从缓存 copy()。
     """
-    m2 = hashlib.md5()
-    m2.update((appid + ts).encode('utf-8'))
-    md5 = m2.hexdigest()
-    md5 = bytes(md5, encoding='utf-8')
-    signa = hmac.new(secret_key.encode('utf-8'), md5, hashlib.sha1).digest()
-    signa = base64.b64encode(signa)
-    return str(signa, 'utf-8')
+    if isinstance(appid, str):
+        appid = appid.encode('utf-8')
+    if isinstance(secret_key, str):
+        secret_key = secret_key.encode('utf-8')
+    # 注意协议：HMAC 的输入是 md5 的十六进制字符串（不是原始 digest）
+    md5_hex = hashlib.md5(appid + ts.encode('ascii')).hexdigest().encode('ascii')
+    h = _xunfei_hmac_base(secret_key).copy()
+    h.update(md5_hex)
+    return base64.b64encode(h.digest()).decode('ascii')
 
 
 def _xunfei_generate_signature(access_key_secret: str, params: dict) -> str:
@@ -391,37 +1124,23 @@ def _xunfei_generate_signature(access_key_secret: str, params: dict) -> str:
     
     1. 排除"signature"字段
     2. 按参数名自然排序
-    3. URL编码每个key和value
+    3. URL编码每个value（key 都是固定的 ASCII 标识符，编码是无用功）
     4. 拼接成 baseString: key1=value1&key2=value2
     5. HMAC-SHA1(baseString, access_key_secret)
     6. Base64编码
     """
-    # 排除signature字段并排序
-    sorted_params = {}
-    for k, v in sorted(params.items()):
-        if k != 'signature' and v is not None and str(v).strip():
-            sorted_params[k] = str(v)
-    
-    # 构建baseString
-    parts = []
-    for k, v in sorted_params.items():
-        # URL编码（标准URL编码，不保留特殊字符）
-        encoded_key = urllib.parse.quote(k, safe='')
-        encoded_value = urllib.parse.quote(v, safe='')
-        parts.append(f"{encoded_key}={encoded_value}")
-    
-    base_string = '&'.join(parts)
-    
-    # HMAC-SHA1
+    # 单趟完成：排序、过滤、编码、拼接（轮询时每 5-10s 调一次）
+    base_string = '&'.join(
+        f"{k}={urllib.parse.quote(str(v), safe='')}"
+        for k, v in sorted(params.items())
+        if k != 'signature' and v is not None and str(v).strip()
+    )
     signature_bytes = hmac.new(
         access_key_secret.encode('utf-8'),
         base_string.encode('utf-8'),
         hashlib.sha1
     ).digest()
-    
-    # Base64编码
-    signature = base64.b64encode(signature_bytes).decode('utf-8')
-    return signature
+    return base64.b64encode(signature_bytes).decode('utf-8')
 
 
 def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_key: str, api_secret: str) -> tuple[bool, str]:
@@ -458,12 +1177,9 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         # 线上（OCI）常见坑：服务器系统时区是 UTC，讯飞接口对 dateTime/时区校验很敏感，
         # 可能返回 signature timeout（code=100008）。
         # 为避免“本地可用但远端不可用”，这里统一用北京时间（+0800）生成 dateTime。
-        if ZoneInfo:
-            now = datetime.now(ZoneInfo("Asia/Shanghai"))
-        else:
-            tz = timezone(timedelta(hours=8))
-            now = datetime.now(tz)
-        date_time = now.strftime("%Y-%m-%dT%H:%M:%S%z")
+        # 时区对象整个任务算一次就够了，上传和每次轮询共用
+        xf_tz = ZoneInfo("Asia/Shanghai") if ZoneInfo else timezone(timedelta(hours=8))
+        date_time = datetime.now(xf_tz).strftime("%Y-%m-%dT%H:%M:%S%z")
         
         # signatureRandom: 16位随机字符串
         signature_random = ''.join(random.choices(string.ascii_letters + string.digits, k=16))
@@ -484,29 +1200,8 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         }
         
         # 生成签名：排除signature字段，排序，URL编码，HMAC-SHA1，Base64
-        sorted_params = {}
-        for k, v in sorted(params.items()):
-            if k != 'signature' and v:
-                sorted_params[k] = v
-        
-        # 构建 baseString
-        parts = []
-        for k, v in sorted_params.items():
-            encoded_key = urllib.parse.quote(k, safe='')
-            encoded_value = urllib.parse.quote(str(v), safe='')
-            parts.append(f"{encoded_key}={encoded_value}")
-        base_string = '&'.join(parts)
-        
-        # HMAC-SHA1
-        signature_bytes = hmac.new(
-            api_secret.encode('utf-8'),
-            base_string.encode('utf-8'),
-            hashlib.sha1
-        ).digest()
-        
-        # Base64编码
-        signature = base64.b64encode(signature_bytes).decode('utf-8')
-        
+        signature = _xunfei_generate_signature(api_secret, params)
+
         # 根据官方文档，signature 应该在请求头中，而不是 URL 参数
         # 构建上传 URL（参数在 URL 中，但不包括 signature）
         upload_params = {k: v for k, v in params.items() if k != 'signature'}
@@ -517,19 +1212,21 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         _set_job(job_id, log_tail=[f"上传 URL: {upload_url[:200]}..."])
         _set_job(job_id, log_tail=[f"签名前10位: {signature[:10]}..."])
         
+        session = _get_xf_session()
+
+        # 直接把文件对象交给 requests 流式发送：不把几百 MB 音频整体读进内存
         with open(audio_path, 'rb') as f:
-            audio_data = f.read()
-        
-        # 根据官方文档，signature 在请求头中
-        upload_resp = requests.post(
-            url=upload_url,
-            headers={
-                "Content-Type": "application/octet-stream",
-                "signature": signature  # 签名在请求头中
-            },
-            data=audio_data,
-            timeout=60
-        )
+            # 根据官方文档，signature 在请求头中
+            upload_resp = session.post(
+                url=upload_url,
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "Content-Length": str(file_len),
+                    "signature": signature  # 签名在请求头中
+                },
+                data=f,
+                timeout=(10, 300)
+            )
         
         _set_job(job_id, log_tail=[f"上传响应状态码: {upload_resp.status_code}"])
         _set_job(job_id, log_tail=[f"上传响应: {upload_resp.text[:500]}"])
@@ -538,7 +1235,8 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
             return False, f"上传失败，状态码: {upload_resp.status_code}, 响应: {upload_resp.text[:500]}"
         
         try:
-            upload_result = upload_resp.json()
+            # orjson 直接吃 bytes，绕过 requests 的 json() 间接层
+            upload_result = _json_loads(upload_resp.content)
         except Exception as e:
             return False, f"上传响应解析失败: {e}, 原始响应: {upload_resp.text[:500]}"
         
@@ -557,7 +1255,7 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         
         if not is_success:
             desc = upload_result.get('message') or upload_result.get('descInfo') or '未知错误'
-            return False, f"上传失败: {desc}, code: {code}, 完整响应: {json.dumps(upload_result, ensure_ascii=False)[:500]}"
+            return False, f"上传失败: {desc}, code: {code}, 完整响应: {_preview(upload_result)}"
         
         # 获取订单ID
         order_id = upload_result.get('content', {}).get('orderId') or upload_result.get('data', {}).get('orderId') or upload_result.get('orderId')
@@ -570,22 +1268,22 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         # 根据 taskEstimateTime 估算最大等待时间（毫秒转秒，再加一些缓冲）
         task_estimate_time = upload_result.get('content', {}).get('taskEstimateTime', 60000)  # 默认60秒
         max_wait_seconds = max(600, int(task_estimate_time / 1000) * 3)  # 至少10分钟，或预估时间的3倍
-        max_polls = max(120, max_wait_seconds // 5)  # 每5秒查询一次，最多轮询 max_polls 次
-        _set_job(job_id, log_tail=[f"预估处理时间: {task_estimate_time}ms ({task_estimate_time/1000:.1f}秒), 最大等待: {max_wait_seconds}秒, 最多查询: {max_polls}次"])
-        
+        _set_job(job_id, log_tail=[f"预估处理时间: {task_estimate_time}ms ({task_estimate_time/1000:.1f}秒), 最大等待: {max_wait_seconds}秒"])
+
+        # 首次就睡到服务端预估完成时间附近（打9折），之后指数退避、封顶30秒：
+        # 固定 5 秒轮询对"预估 120 秒"的任务要空转 20 多次，纯属浪费
+        deadline = time.monotonic() + max_wait_seconds
+        next_wait = min(30.0, max(10.0, task_estimate_time / 1000 * 0.9))
         poll_count = 0
-        
-        while poll_count < max_polls:
+
+        while time.monotonic() < deadline:
+            time.sleep(min(next_wait, max(1.0, deadline - time.monotonic())))
             poll_count += 1
-            _set_job(job_id, message=f"查询转写结果… ({poll_count}/{max_polls})", progress=50 + min(40, poll_count * 40 // max_polls))
-            
+            elapsed = max_wait_seconds - (deadline - time.monotonic())
+            _set_job(job_id, message=f"查询转写结果… (第{poll_count}次)", progress=50 + min(40, int(elapsed * 40 / max_wait_seconds)))
+
             # 每次查询都需要新的参数和签名
-            if ZoneInfo:
-                now = datetime.now(ZoneInfo("Asia/Shanghai"))
-            else:
-                tz = timezone(timedelta(hours=8))
-                now = datetime.now(tz)
-            date_time = now.strftime("%Y-%m-%dT%H:%M:%S%z")
+            date_time = datetime.now(xf_tz).strftime("%Y-%m-%dT%H:%M:%S%z")
             signature_random = ''.join(random.choices(string.ascii_letters + string.digits, k=16))
             
             query_params = {
@@ -597,28 +1295,11 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
             }
             
             # 生成签名
-            sorted_query_params = {}
-            for k, v in sorted(query_params.items()):
-                if k != 'signature' and v:
-                    sorted_query_params[k] = v
-            
-            parts = []
-            for k, v in sorted_query_params.items():
-                encoded_key = urllib.parse.quote(k, safe='')
-                encoded_value = urllib.parse.quote(str(v), safe='')
-                parts.append(f"{encoded_key}={encoded_value}")
-            base_string = '&'.join(parts)
-            
-            signature_bytes = hmac.new(
-                api_secret.encode('utf-8'),
-                base_string.encode('utf-8'),
-                hashlib.sha1
-            ).digest()
-            signature = base64.b64encode(signature_bytes).decode('utf-8')
-            
+            signature = _xunfei_generate_signature(api_secret, query_params)
+
             # 根据官方文档，signature 应该在请求头中
             result_url = api_host + api_get_result + "?" + urllib.parse.urlencode(query_params, quote_via=urllib.parse.quote)
-            result_resp = requests.get(
+            result_resp = session.get(
                 url=result_url,
                 headers={"signature": signature},  # 签名在请求头中
                 timeout=30
@@ -628,7 +1309,7 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
                 return False, f"查询失败，状态码: {result_resp.status_code}, 响应: {result_resp.text[:500]}"
             
             try:
-                result_data = result_resp.json()
+                result_data = _json_loads(result_resp.content)
             except Exception as e:
                 return False, f"查询响应解析失败: {e}, 原始响应: {result_resp.text[:500]}"
             
@@ -647,7 +1328,7 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
             
             if not is_success:
                 desc = result_data.get('message') or result_data.get('descInfo') or '未知错误'
-                return False, f"查询失败: {desc}, code: {code}, 完整响应: {json.dumps(result_data, ensure_ascii=False)[:500]}"
+                return False, f"查询失败: {desc}, code: {code}, 完整响应: {_preview(result_data)}"
             
             # 检查状态
             # 根据响应，status 在 content.orderInfo.status 中
@@ -655,7 +1336,7 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
             order_info = result_data.get('content', {}).get('orderInfo', {})
             status = order_info.get('status') or result_data.get('content', {}).get('status') or result_data.get('data', {}).get('status') or result_data.get('status')
             
-            _set_job(job_id, log_tail=[f"查询状态: {status}, orderInfo: {json.dumps(order_info, ensure_ascii=False)[:200]}"])
+            _set_job(job_id, log_tail=[f"查询状态: {status}, orderInfo: {_preview(order_info, 200)}"])
             
             # status: 0或3=处理中, 4=完成, 2=失败
             if status == 4:
@@ -670,37 +1351,34 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
                     if isinstance(order_result, str):
                         # 如果是字符串，尝试解析 JSON
                         try:
-                            order_result = json.loads(order_result)
-                        except:
+                            order_result = _json_loads(order_result)
+                        except Exception:
                             pass
                     
                     if isinstance(order_result, dict):
                         # 尝试从 lattice -> json_1best 结构中提取文本
+                        # （st -> rt -> ws -> cw -> w）。一小时录音有几百个
+                        # lattice 段，解析走 _json_loads（有 orjson 就用 C 解析器），
+                        # 提取用单个生成器表达式攒进 all_words
                         lattice = order_result.get('lattice', [])
                         if lattice and len(lattice) > 0:
-                            # 遍历所有 lattice 项（可能有多段）
                             all_words = []
                             for lattice_item in lattice:
                                 json_1best_str = lattice_item.get('json_1best', '')
-                                if json_1best_str:
-                                    try:
-                                        json_1best = json.loads(json_1best_str)
-                                        # 从 st -> rt -> ws -> cw -> w 中提取文本
-                                        st = json_1best.get('st', {})
-                                        rt = st.get('rt', [])
-                                        
-                                        # 遍历所有 rt 项（每段可能有多个 rt）
-                                        for rt_item in rt:
-                                            ws = rt_item.get('ws', [])
-                                            for ws_item in ws:
-                                                cw = ws_item.get('cw', [])
-                                                for cw_item in cw:
-                                                    word = cw_item.get('w', '')
-                                                    if word:
-                                                        all_words.append(word)
-                                    except Exception as e:
-                                        _set_job(job_id, log_tail=[f"解析 json_1best 失败: {e}, 内容: {json_1best_str[:200]}"])
-                            
+                                if not json_1best_str:
+                                    continue
+                                try:
+                                    json_1best = _json_loads(json_1best_str)
+                                    all_words.extend(
+                                        cw_item['w']
+                                        for rt_item in json_1best.get('st', {}).get('rt', [])
+                                        for ws_item in rt_item.get('ws', [])
+                                        for cw_item in ws_item.get('cw', [])
+                                        if cw_item.get('w')
+                                    )
+                                except Exception as e:
+                                    _set_job(job_id, log_tail=[f"解析 json_1best 失败: {e}, 内容: {json_1best_str[:200]}"])
+
                             if all_words:
                                 result_text = ''.join(all_words)
                                 _set_job(job_id, log_tail=[f"提取到 {len(all_words)} 个词，总长度: {len(result_text)} 字符"])
@@ -743,25 +1421,19 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
                 if result_text:
                     return True, result_text.strip()
                 else:
-                    return False, f"转写完成但未找到文本结果。响应: {json.dumps(result_data, ensure_ascii=False)[:500]}"
+                    return False, f"转写完成但未找到文本结果。响应: {_preview(result_data)}"
             
             if status == 2:
                 return False, f"转写失败: {result_data.get('message', '未知错误')}"
             
-            # status == 0 或 3，继续等待（处理中）
-            # 根据 taskEstimateTime 调整等待时间
-            wait_time = 5  # 默认5秒
-            task_estimate = result_data.get('content', {}).get('taskEstimateTime', 0)
-            if task_estimate > 0:
-                # 如果预估时间还很长，可以稍微延长等待间隔
-                remaining_estimate = task_estimate / 1000  # 转为秒
-                if remaining_estimate > 60:
-                    wait_time = 10  # 如果预估时间超过1分钟，每10秒查询一次
-                elif remaining_estimate > 30:
-                    wait_time = 7   # 如果预估时间超过30秒，每7秒查询一次
-            
-            time.sleep(wait_time)  # 等待后再次查询
-        
+            # status == 0 或 3，继续等待（处理中）：服务端给了 Retry-After
+            # 就照办，否则指数退避（×1.5，封顶30秒）
+            retry_after = result_resp.headers.get('Retry-After')
+            try:
+                next_wait = min(30.0, float(retry_after)) if retry_after else min(30.0, next_wait * 1.5)
+            except (TypeError, ValueError):
+                next_wait = min(30.0, next_wait * 1.5)
+
         return False, f"转写超时（已查询 {poll_count} 次）"
         
     except requests.exceptions.RequestException as e:
@@ -770,6 +1442,36 @@ def _xunfei_transcribe_new_api(audio_path: Path, job_id: str, appid: str, api_ke
         return False, f"新版 API 调用异常: {e}"
 
 
+def _xunfei_result_text(content: dict) -> str:
+    """
+    从转写结果的 content 里提取文本。候选字段路径按出现概率排序
+    （orderInfo.result → result → text → data），每条路径只做一次
+    list/dict 归并——之前是五段复制粘贴的 if not result_text 分支。
+    """
+    order_info = content.get('orderInfo', {})
+    for node in (order_info.get('result'), content.get('result'), content.get('text'), content.get('data')):
+        if not node:
+            continue
+        if isinstance(node, str):
+            return node
+        if isinstance(node, list):
+            # 可能的结构：{"oneBest": "文本", "speaker": 1} 或 {"text": "文本"}；
+            # 生成器直接喂 join，万行结果不再攒一遍中间 list
+            joined = '\n'.join(
+                t
+                for item in node
+                for t in ((item.get('oneBest') or item.get('text') or item.get('content') or str(item))
+                          if isinstance(item, dict) else str(item),)
+                if t
+            )
+            if joined:
+                return joined
+        elif isinstance(node, dict):
+            # 嵌套结构：原样序列化留给调用方处理
+            return json.dumps(node, ensure_ascii=False)
+    return ""
+
+
 def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: str) -> tuple[bool, str]:
     """
     科大讯飞 HTTP API 转写（raasr.xfyun.cn）
@@ -784,8 +1486,11 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
     api_get_result = '/getResult'
 
     try:
+        # appid/密钥整个任务只编码一次，上传和轮询共用
+        appid_b = appid.encode('utf-8')
+        secret_b = secret_key.encode('utf-8')
         ts = str(int(time.time()))
-        signa = _xunfei_get_signa(appid, secret_key, ts)
+        signa = _xunfei_get_signa(appid_b, secret_b, ts)
 
         # 第一步：上传文件
         _set_job(job_id, message="上传音频到科大讯飞…", progress=20)
@@ -804,21 +1509,22 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
         # 调试：记录签名信息（不包含完整密钥）
         _set_job(job_id, log_tail=[f"签名调试: appId={appid}, ts={ts}, signa前10位={signa[:10]}..."])
 
-        with open(audio_path, 'rb') as f:
-            audio_data = f.read()
-
         # 构建上传 URL
         upload_url = lfasr_host + api_upload + "?" + urllib.parse.urlencode(param_dict, quote_via=urllib.parse.quote)
-        
+
         # 调试：记录完整 URL（不包含音频数据）
         _set_job(job_id, log_tail=[f"上传 URL: {upload_url[:200]}..."])
-        
-        upload_resp = requests.post(
-            url=upload_url,
-            headers={"Content-type": "application/json"},
-            data=audio_data,
-            timeout=60
-        )
+
+        session = _get_xf_session()
+
+        # 文件对象直接流式发送，不整体读进内存
+        with open(audio_path, 'rb') as f:
+            upload_resp = session.post(
+                url=upload_url,
+                headers={"Content-type": "application/json", "Content-Length": str(file_len)},
+                data=f,
+                timeout=(10, 300)
+            )
 
         # 详细日志：记录请求和响应
         log_lines = [
@@ -833,12 +1539,12 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
             return False, f"上传失败，状态码: {upload_resp.status_code}, 响应: {upload_resp.text[:500]}"
 
         try:
-            upload_result = upload_resp.json()
+            upload_result = _json_loads(upload_resp.content)
         except Exception as e:
             return False, f"上传响应解析失败: {e}, 原始响应: {upload_resp.text[:500]}"
 
         # 详细日志：记录解析后的响应
-        log_lines.append(f"解析后的响应: {json.dumps(upload_result, ensure_ascii=False)[:500]}")
+        log_lines.append(f"解析后的响应: {_preview(upload_result)}")
         _set_job(job_id, log_tail=log_lines)
 
         # code 可能是字符串或数字，检查是否为成功（0 或 "0"）
@@ -847,7 +1553,7 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
             desc = upload_result.get('desc') or upload_result.get('descInfo') or '未知错误'
             log_lines.append(f"错误: {desc}, code: {code}")
             _set_job(job_id, log_tail=log_lines)
-            return False, f"上传失败: {desc}, code: {code}, 完整响应: {json.dumps(upload_result, ensure_ascii=False)[:500]}"
+            return False, f"上传失败: {desc}, code: {code}, 完整响应: {_preview(upload_result)}"
 
         order_id = upload_result.get('content', {}).get('orderId')
         if not order_id:
@@ -856,17 +1562,21 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
         # 第二步：轮询查询结果
         _set_job(job_id, message="等待转写结果…", progress=50)
         
-        max_polls = 120  # 最多轮询 120 次（10分钟）
+        # 指数退避 + 全抖动（1s→2s→4s…封顶30s）：短任务早返回，长任务少打空请求；
+        # 上限改成 10 分钟时间预算而不是固定轮询次数
+        poll_budget = 600.0
+        poll_start = time.monotonic()
         poll_count = 0
         status = 3  # 3=处理中，4=完成
 
-        while status == 3 and poll_count < max_polls:
+        while status == 3 and (time.monotonic() - poll_start) < poll_budget:
             poll_count += 1
-            _set_job(job_id, message=f"查询转写结果… ({poll_count}/{max_polls})", progress=50 + min(40, poll_count * 40 // max_polls))
+            elapsed = time.monotonic() - poll_start
+            _set_job(job_id, message=f"查询转写结果…（已等待 {int(elapsed)} 秒）", progress=50 + min(40, int(elapsed * 40 / poll_budget)))
 
             # 每次查询都需要新的 ts 和 signa
             ts_query = str(int(time.time()))
-            signa_query = _xunfei_get_signa(appid, secret_key, ts_query)
+            signa_query = _xunfei_get_signa(appid_b, secret_b, ts_query)
             param_dict = {
                 'appId': appid,
                 'signa': signa_query,
@@ -876,7 +1586,7 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
             }
 
             result_url = lfasr_host + api_get_result + "?" + urllib.parse.urlencode(param_dict)
-            result_resp = requests.post(
+            result_resp = session.post(
                 url=result_url,
                 headers={"Content-type": "application/json"},
                 timeout=30
@@ -886,7 +1596,7 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
                 return False, f"查询失败，状态码: {result_resp.status_code}, 响应: {result_resp.text[:500]}"
 
             try:
-                result_data = result_resp.json()
+                result_data = _json_loads(result_resp.content)
             except Exception as e:
                 return False, f"查询响应解析失败: {e}, 原始响应: {result_resp.text[:500]}"
 
@@ -894,84 +1604,26 @@ def _xunfei_transcribe(audio_path: Path, job_id: str, appid: str, secret_key: st
             code = result_data.get('code')
             if code != 0 and str(code) != "0":
                 desc = result_data.get('desc') or result_data.get('descInfo') or '未知错误'
-                return False, f"查询失败: {desc}, code: {code}, 完整响应: {json.dumps(result_data, ensure_ascii=False)[:500]}"
+                return False, f"查询失败: {desc}, code: {code}, 完整响应: {_preview(result_data)}"
 
             order_info = result_data.get('content', {}).get('orderInfo', {})
             status = order_info.get('status', 3)
 
             if status == 4:
-                # 完成，提取文本结果
-                result_text = ""
+                # 完成，提取文本结果（候选字段路径统一走 _xunfei_result_text）
                 content = result_data.get('content', {})
-                order_info = content.get('orderInfo', {})
-                
-                # 尝试多种可能的字段路径
-                # 1. content.orderInfo.result (常见格式)
-                if 'result' in order_info:
-                    result_data_field = order_info['result']
-                    if isinstance(result_data_field, str):
-                        result_text = result_data_field
-                    elif isinstance(result_data_field, list):
-                        # 分段结果，合并
-                        texts = []
-                        for item in result_data_field:
-                            if isinstance(item, dict):
-                                # 可能的结构：{"oneBest": "文本", "speaker": 1} 或 {"text": "文本"}
-                                text = item.get('oneBest') or item.get('text') or item.get('content') or str(item)
-                                if text:
-                                    texts.append(text)
-                            else:
-                                texts.append(str(item))
-                        result_text = '\n'.join(filter(None, texts))
-                    elif isinstance(result_data_field, dict):
-                        # 可能是嵌套结构
-                        result_text = json.dumps(result_data_field, ensure_ascii=False)
-                
-                # 2. content.result
-                if not result_text and 'result' in content:
-                    result_data_field = content['result']
-                    if isinstance(result_data_field, str):
-                        result_text = result_data_field
-                    elif isinstance(result_data_field, list):
-                        texts = []
-                        for item in result_data_field:
-                            if isinstance(item, dict):
-                                text = item.get('oneBest') or item.get('text') or item.get('content') or str(item)
-                                if text:
-                                    texts.append(text)
-                            else:
-                                texts.append(str(item))
-                        result_text = '\n'.join(filter(None, texts))
-                
-                # 3. content.text
-                if not result_text and 'text' in content:
-                    result_text = str(content['text'])
-                
-                # 4. content.data
-                if not result_text and 'data' in content:
-                    data = content['data']
-                    if isinstance(data, list) and len(data) > 0:
-                        texts = []
-                        for item in data:
-                            if isinstance(item, dict):
-                                text = item.get('oneBest') or item.get('text') or item.get('content') or str(item)
-                                if text:
-                                    texts.append(text)
-                            else:
-                                texts.append(str(item))
-                        result_text = '\n'.join(filter(None, texts))
-                    elif isinstance(data, str):
-                        result_text = data
-                
-                # 5. 如果还是找不到，返回完整响应用于调试
+                result_text = _xunfei_result_text(content)
+
+                # 如果还是找不到，返回完整响应用于调试
                 if not result_text.strip():
-                    full_response = json.dumps(result_data, ensure_ascii=False, indent=2)
-                    _set_job(job_id, log_tail=[f"完整响应: {full_response[:1000]}"])
+                    full_response = _preview(result_data, 1000)
+                    _set_job(job_id, log_tail=[f"完整响应: {full_response}"])
                     return False, f"转写完成但未找到文本结果。响应结构已记录到日志，请查看任务详情或联系开发者。响应预览: {full_response[:500]}"
 
                 return True, result_text.strip()
 
-            time.sleep(5)  # 等待 5 秒后再次查询
+            delay = min(30, 2 ** min(poll_count, 5))
+            time.sleep(delay * (0.5 + random.random() * 0.5))
 
         return False, f"转写超时（已查询 {poll_count} 次），最后状态: {status}"
 
@@ -1031,20 +1683,27 @@ def _api_transcribe(audio_path: Path, job_id: str) -> tuple[bool, str]:
     try:
         _set_job(job_id, message="调用 STT API 转写中…", progress=50)
 
-        # 读取音频文件
-        audio_data = audio_path.read_bytes()
-
-        # 构建请求
-        req = urllib.request.Request(api_url, data=audio_data)
-        req.add_header("Content-Type", "audio/wav")
+        headers = {"Content-Type": "audio/wav"}
         if api_key:
-            req.add_header("Authorization", f"Bearer {api_key}")
-
-        # 发送请求
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            if resp.status != 200:
-                return False, f"STT API 返回错误状态码: {resp.status}"
-            result_text = resp.read().decode("utf-8", errors="ignore").strip()
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        session = _get_xf_session()
+        if session is not None:
+            # 复用 keep-alive Session + 文件对象流式发送，不整体读进内存
+            with open(audio_path, "rb") as fh:
+                resp = session.post(api_url, headers=headers, data=fh, timeout=(10, 300))
+            if resp.status_code != 200:
+                return False, f"STT API 返回错误状态码: {resp.status_code}"
+            result_text = resp.content.decode("utf-8", errors="ignore").strip()
+        else:
+            # 未安装 requests 时退回 urllib（一次性读入）
+            req = urllib.request.Request(api_url, data=audio_path.read_bytes())
+            for k, v in headers.items():
+                req.add_header(k, v)
+            with urllib.request.urlopen(req, timeout=300) as resp:
+                if resp.status != 200:
+                    return False, f"STT API 返回错误状态码: {resp.status}"
+                result_text = resp.read().decode("utf-8", errors="ignore").strip()
 
         if not result_text:
             return False, "STT API 返回空结果"
@@ -1069,13 +1728,19 @@ def _worker(job_id: str, src_path: Path, mode: str = "local"):
     _set_job(job_id, status="running", message="开始处理音频…", started_at=transcribe_start_time)
     try:
         if mode == "api":
-            # API 模式：直接使用原始文件或转换为 WAV
-            wav_path = WORK_DIR / f"{job_id}.wav"
-            _set_job(job_id, message="转码中（ffmpeg）…", progress=10)
-            ok, ffmpeg_log = _to_wav_16k_mono(src_path, wav_path)
-            if not ok:
-                _set_job(job_id, status="error", message="ffmpeg 转换失败（请确认已安装 ffmpeg）", log=ffmpeg_log)
-                return
+            # API 模式：云端转写（讯飞）直接吃原始压缩音频（mp3/m4a/wav 均可），
+            # 本地先全量解码重编码一遍纯属浪费；只有通用 STT API（约定收
+            # audio/wav）且源不是标准 WAV 时才需要 ffmpeg 转码
+            cfg = _load_local_config()
+            if cfg.get("stt_api_type") == "xunfei" or _is_whisper_ready_wav(src_path):
+                wav_path = src_path
+            else:
+                wav_path = WORK_DIR / f"{job_id}.wav"
+                _set_job(job_id, message="转码中（ffmpeg）…", progress=10)
+                ok, ffmpeg_log = _to_wav_16k_mono(src_path, wav_path)
+                if not ok:
+                    _set_job(job_id, status="error", message="ffmpeg 转换失败（请确认已安装 ffmpeg）", log=ffmpeg_log)
+                    return
 
             _set_job(job_id, message="调用 STT API 转写中…", progress=30)
             ok, result = _api_transcribe(wav_path, job_id)
@@ -1084,13 +1749,16 @@ def _worker(job_id: str, src_path: Path, mode: str = "local"):
                 return
 
             text = _to_simplified_zh(result)
+            # 文本落盘为准，job dict 只存路径：长转写不再常驻内存
+            txt_path = WORK_DIR / f"{job_id}.txt"
+            txt_path.write_text(text, encoding="utf-8")
             transcribe_end_time = time.time()
             transcribe_duration = transcribe_end_time - transcribe_start_time
-            _set_job(job_id, status="done", message="完成", text=text, finished_at=transcribe_end_time, transcribe_duration=transcribe_duration)
+            _set_job(job_id, status="done", message="完成", text_path=str(txt_path), finished_at=transcribe_end_time, transcribe_duration=transcribe_duration)
 
         else:
             # 本地模式（默认）：使用 whisper-cli
-            if not Path(WHISPER_MODEL).exists():
+            if not _model_exists():
                 _set_job(
                     job_id,
                     status="error",
@@ -1098,16 +1766,10 @@ def _worker(job_id: str, src_path: Path, mode: str = "local"):
                 )
                 return
 
-            wav_path = WORK_DIR / f"{job_id}.wav"
-            _set_job(job_id, message="转码中（ffmpeg）…", progress=0)
-            ok, ffmpeg_log = _to_wav_16k_mono(src_path, wav_path)
-            if not ok:
-                _set_job(job_id, status="error", message="ffmpeg 转换失败（请确认已安装 ffmpeg）", log=ffmpeg_log)
-                return
-
+            # ffmpeg 解码直接通过管道进 whisper，不再写中间 WAV
             _set_job(job_id, status="running", message="开始转写（Whisper）…", progress=0)
             out_prefix = WORK_DIR / f"{job_id}"
-            ok, whisper_log = _whisper_transcribe(wav_path, out_prefix)
+            ok, whisper_log = _whisper_transcribe(src_path, out_prefix)
             if not ok:
                 _set_job(job_id, status="error", message="Whisper 转写失败（请确认 whisper 可执行文件可用）", log=whisper_log)
                 return
@@ -1121,14 +1783,24 @@ def _worker(job_id: str, src_path: Path, mode: str = "local"):
 
             raw_text = txt_path.read_text(encoding="utf-8", errors="ignore") if txt_path.exists() else ""
             text = _to_simplified_zh(raw_text)
+            # 简体化后的文本写回文件，job dict 只存路径（下载/打包都直接读这份）
+            if text != raw_text:
+                txt_path.write_text(text, encoding="utf-8")
             transcribe_end_time = time.time()
             transcribe_duration = transcribe_end_time - transcribe_start_time
-            _set_job(job_id, status="done", message="完成", text=text, finished_at=transcribe_end_time, transcribe_duration=transcribe_duration, log=whisper_log)
+            _set_job(job_id, status="done", message="完成", text_path=str(txt_path), finished_at=transcribe_end_time, transcribe_duration=transcribe_duration, log=whisper_log)
 
         # 额外：在 survey/ 目录落一份结果，方便你在"访谈材料目录"直接看到输出
-        original_name = (_get_job(job_id) or {}).get("original_filename") or f"{job_id}{src_path.suffix}"
+        job = _get_job(job_id)
+        original_name = (job.original_filename if job else "") or f"{job_id}{src_path.suffix}"
         out_name = f"{_safe_basename(original_name)}_{job_id}.txt"
         (SURVEY_DIR / out_name).write_text(text, encoding="utf-8")
+
+        # 结果已落盘，原始上传不再需要（之前从不删除，uploads/ 只增不减）
+        try:
+            src_path.unlink()
+        except OSError:
+            pass
     except Exception as e:
         _set_job(job_id, status="error", message=f"服务异常：{e}")
 
@@ -1154,7 +1826,7 @@ def transcribe():
 
     if mode == "local":
         # 本地模式需要检查模型文件
-        if not Path(WHISPER_MODEL).exists():
+        if not _model_exists():
             return (
                 jsonify(
                     {
@@ -1189,7 +1861,7 @@ def transcribe():
     job_id = uuid.uuid4().hex
     suffix = Path(f.filename).suffix or ".audio"
     src_path = UPLOAD_DIR / f"{job_id}{suffix}"
-    f.save(str(src_path))
+    _save_upload(f, src_path)
 
     _set_job(
         job_id,
@@ -1198,8 +1870,9 @@ def transcribe():
         created_at=time.time(),
         original_filename=f.filename,
     )
-    t = threading.Thread(target=_worker, args=(job_id, src_path, mode), daemon=True)
-    t.start()
+    executor = _api_job_executor if mode == "api" else _job_executor
+    future = executor.submit(_worker, job_id, src_path, mode)
+    _set_job(job_id, future=future)
 
     return jsonify({"job_id": job_id})
 
@@ -1209,115 +1882,173 @@ def job(job_id: str):
     j = _get_job(job_id)
     if not j:
         return jsonify({"error": "job 不存在"}), 404
+    # 完成后按需从文件读文本（job 只存 text_path，不长期占内存）
+    text = j.text
+    if not text and j.status == "done" and j.text_path:
+        try:
+            text = Path(j.text_path).read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            text = ""
     # 只返回必要字段，避免日志过大
     resp = {
         "job_id": job_id,
-        "status": j.get("status"),
-        "message": j.get("message"),
-        "progress": j.get("progress"),
-        "text": j.get("text", ""),
-        "log_tail": j.get("log_tail", []),
-        "transcribe_duration": j.get("transcribe_duration"),
+        "status": j.status,
+        "message": j.message,
+        "progress": j.progress,
+        "text": text,
+        "log_tail": list(j.log_tail),
+        "transcribe_duration": j.transcribe_duration or None,
     }
     return jsonify(resp)
 
 
+@app.get("/api/jobs/<job_id>/events")
+def job_events(job_id: str):
+    """
+    SSE 推送任务进度：只在状态真正变化时发事件，替代浏览器每 ~500ms 轮询
+    /api/jobs/<id>（10 分钟转写约 1200 次空轮询）。任务结束后自动收流。
+    """
+    if _get_job(job_id) is None:
+        return jsonify({"error": "job 不存在"}), 404
+
+    def gen():
+        while True:
+            job = _get_job(job_id)
+            if job is None:
+                break
+            payload = {
+                "job_id": job_id,
+                "status": job.status,
+                "message": job.message,
+                "progress": job.progress,
+                "transcribe_duration": job.transcribe_duration or None,
+            }
+            yield b"data: " + _json_dumps_bytes(payload) + b"\n\n"
+            if job.status in ("done", "error"):
+                break
+            # 挂在当前 Event 上等状态变化；30s 兜底心跳避免代理断连
+            job.event.wait(timeout=30)
+
+    resp = Response(stream_with_context(gen()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
 @app.get("/api/jobs")
 def list_jobs():
     """列出最近的任务（最多20个），用于调试"""
-    with _jobs_lock:
-        jobs_list = list(_jobs.items())
-        # 按创建时间倒序排列
-        jobs_list.sort(key=lambda x: x[1].get("created_at", 0) or 0, reverse=True)
-        result = []
-        for job_id, job_data in jobs_list[:20]:
-            result.append({
-                "job_id": job_id,
-                "status": job_data.get("status"),
-                "message": job_data.get("message"),
-                "created_at": job_data.get("created_at"),
-                "finished_at": job_data.get("finished_at"),
-            })
-        return jsonify({"jobs": result})
+    # list(dict.items()) 是单次 C 调用，GIL 下本身就是一致快照，不必抢
+    # _jobs_lock（否则每次调试轮询都会和 worker 的新建任务争锁）
+    jobs_list = list(_jobs.items())
+    # 只要最近 20 个：nlargest 是 O(N log 20)，不用对全量任务做整排
+    top = heapq.nlargest(20, jobs_list, key=lambda x: x[1].created_at or 0)
+    result = []
+    for job_id, job_data in top:
+        result.append({
+            "job_id": job_id,
+            "status": job_data.status,
+            "message": job_data.message,
+            "created_at": job_data.created_at or None,
+            "finished_at": job_data.finished_at or None,
+        })
+    return jsonify({"jobs": result})
 
 
 @app.get("/api/jobs/<job_id>/download")
 def download_job_text(job_id: str):
     """
-    下载转写文本（.txt）。优先使用内存里的 text；否则读取 data/work/<job_id>.txt
+    下载转写文本（.txt）。直接 send_file 磁盘上的文件（conditional=True 可走
+    sendfile/零拷贝 + 304），不再把内存文本重写一遍磁盘。
     """
     j = _get_job(job_id)
-    if j and j.get("text"):
-        tmp = WORK_DIR / f"{job_id}.txt"
-        tmp.write_text(j.get("text", ""), encoding="utf-8")
-        return send_file(
-            str(tmp),
-            mimetype="text/plain; charset=utf-8",
-            as_attachment=True,
-            download_name=f"{job_id}.txt",
-        )
-
-    txt_path = WORK_DIR / f"{job_id}.txt"
+    txt_path = Path(j.text_path) if j and j.text_path else WORK_DIR / f"{job_id}.txt"
     if not txt_path.exists():
-        alt = WORK_DIR / f"{job_id}.txt"
-        if not alt.exists():
-            return jsonify({"error": "转写文本不存在或任务未完成"}), 404
-        txt_path = alt
+        return jsonify({"error": "转写文本不存在或任务未完成"}), 404
 
     return send_file(
         str(txt_path),
         mimetype="text/plain; charset=utf-8",
         as_attachment=True,
         download_name=f"{job_id}.txt",
+        conditional=True,
     )
 
 
-def _extract_questions_from_docx(docx_path: Path) -> list[dict]:
+def _iter_docx_paragraphs(docx_path: Path):
     """
-    从 docx 里提取“编号清晰”的问题。
-    输出: [{id: '1', text: '...'}, ...]
+    直接 zip + iterparse 读 word/document.xml，逐段产出 <w:p> 的纯文本。
+    python-docx 会把样式/关系/run 全量建成 DOM，这里只要段落文本，
+    流式解析在大 docx 上快一个量级且峰值内存是常数。
+    """
+    with zipfile.ZipFile(str(docx_path)) as z:
+        with z.open("word/document.xml") as f:
+            # w:t 的 end 事件本来就按文档序到达，直接攒文本、遇 w:p 结束吐段落，
+            # 不必对每个段落子树再 iter() 走一遍
+            texts: list[str] = []
+            for _, el in ET.iterparse(f, events=("end",)):
+                tag = el.tag
+                if tag.endswith("}t"):
+                    if el.text:
+                        texts.append(el.text)
+                elif tag.endswith("}p"):
+                    yield "".join(texts)
+                    texts.clear()
+                    el.clear()
+
+
+def _extract_docx(docx_path: Path) -> tuple[list[dict], str]:
+    """
+    单次扫描同时产出“编号清晰”的问题列表与全文（避免同一个文件解析两遍）。
+    返回 (questions, full_text)，questions: [{id: '1', text: '...'}, ...]
     """
-    try:
-        from docx import Document
-    except ImportError:
-        raise RuntimeError("需要安装 python-docx：pip install python-docx")
-    doc = Document(str(docx_path))
     questions: list[dict] = []
-
-    # 常见编号：1. / 1、/ 1) / （1）/ 1）/ Q1 / Q1:
-    q_re = re.compile(r"^(?:Q\\s*)?(\\d{1,3})\\s*(?:[\\.、:：\\)）]|（\\1）)\\s*(.+)$", re.IGNORECASE)
-
-    for p in doc.paragraphs:
-        t = (p.text or "").strip()
+    lines: list[str] = []
+    for raw in _iter_docx_paragraphs(docx_path):
+        t = raw.strip()
         if not t:
             continue
-        m = q_re.match(t)
+        lines.append(t)
+        # 廉价预筛：编号行只可能以数字或 Q 开头，其余段落不进正则引擎
+        # （所有编号变体已熔合在 _DOCX_QUESTION_RE 这一个交替式里，单次扫描）
+        if not (t[0].isdigit() or t[0] in "Qq"):
+            continue
+        m = _DOCX_QUESTION_RE.match(t)
         if not m:
             continue
-        qid = m.group(1).strip()
         qtext = m.group(2).strip()
         if qtext:
-            questions.append({"id": qid, "text": qtext})
-
-    return questions
+            questions.append({"id": m.group(1).strip(), "text": qtext})
+    return questions, "\n".join(lines)
 
 
-def _extract_full_text_from_docx(docx_path: Path) -> str:
+@functools.lru_cache(maxsize=32)
+def _extract_docx_cached(digest: str, docx_path_str: str) -> tuple[list[dict], str]:
+    """
+    按内容摘要缓存解析结果：同一问题模板反复上传时只解析一次。
+    进程内走 lru_cache；另外在 docx 旁落一个 .json sidecar，
+    重启后（lru_cache 清空）也不用重新解析 XML。
+    """
+    docx_path = Path(docx_path_str)
+    sidecar = docx_path.with_suffix(".json")
     try:
-        from docx import Document
-    except ImportError:
-        raise RuntimeError("需要安装 python-docx：pip install python-docx")
-    doc = Document(str(docx_path))
-    lines: list[str] = []
-    for p in doc.paragraphs:
-        t = (p.text or "").strip()
-        if t:
-            lines.append(t)
-    return "\n".join(lines)
+        cached = _json_loads(sidecar.read_bytes())
+        return cached["questions"], cached["docx_text"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    questions, docx_text = _extract_docx(docx_path)
+    try:
+        sidecar.write_bytes(_json_dumps_bytes({"questions": questions, "docx_text": docx_text}))
+    except OSError:
+        pass
+    return questions, docx_text
 
 
+@functools.lru_cache(maxsize=16)
 def _build_qa_prompt(transcript: str, questions_text: str) -> str:
     # 目标：输出“问题/答案”的干净纯文本（用户已验证的提示词风格）
+    # lru_cache：同一对转写+问题清单反复匹配（换模型重试）时不重拼 MB 级大字符串；
+    # key 就是入参字符串本身——CPython 会缓存 str 的 hash，第二次起零哈希开销
     return f"""我上传了两份文件，一份是录音.txt，是对采访者的录音内容。 questions.txt 这是准备好的问题，我需要你分析录音的内容，并把里面的内容分别匹配到对应的 questions 的问题里面，但是录音中，无法区分出采访者和被采访者，你只能自己去识别判断。
 
 请**使用简体中文**输出（不要使用繁体字；如遇到专有名词保持原样）。
@@ -1408,10 +2139,79 @@ def _split_text_chunks(text: str, max_chars: int) -> list[str]:
     return [c for c in chunks if c]
 
 
+_openrouter_session = None
+
+
+def _get_openrouter_session():
+    """
+    模块级 requests.Session（懒初始化）：TLS 握手在多次调用/多模型 Fallback
+    之间复用，每次重试省 1-2 个 RTT 的连接建立。未安装 requests 时返回 None。
+    """
+    global _openrouter_session
+    if requests is None:
+        return None
+    if _openrouter_session is None:
+        s = requests.Session()
+        s.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _openrouter_session = s
+    return _openrouter_session
+
+
+def _parse_openrouter_sse(lines) -> dict:
+    """
+    逐行消费 SSE（data: ...）增量，拼装成与非流式相同结构的响应 dict。
+    """
+    content_parts: list[str] = []
+    finish_reason = ""
+    usage: dict = {}
+    for raw_line in lines:
+        if not raw_line:
+            continue
+        line = raw_line.decode("utf-8", errors="ignore").strip() if isinstance(raw_line, bytes) else raw_line.strip()
+        if not line.startswith("data:"):
+            continue
+        data_str = line[5:].strip()
+        if data_str == "[DONE]":
+            break
+        try:
+            chunk = _json_loads(data_str)
+        except Exception:
+            continue
+        if chunk.get("error"):
+            raise RuntimeError(f"OpenRouter stream error: {chunk['error']}")
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+        choices = chunk.get("choices") or []
+        if not choices:
+            continue
+        if choices[0].get("error"):
+            raise RuntimeError(f"Model returned inner error: {choices[0]['error']}")
+        piece = (choices[0].get("delta") or {}).get("content") or ""
+        if piece:
+            content_parts.append(piece)
+        finish_reason = choices[0].get("finish_reason") or finish_reason
+
+    return {
+        "choices": [
+            {
+                "message": {"content": "".join(content_parts)},
+                "finish_reason": finish_reason,
+            }
+        ],
+        "usage": usage,
+    }
+
+
 def _openrouter_chat(api_key: str, model: str, prompt: str, max_tokens: int) -> dict:
     """
     OpenRouter（OpenAI 兼容）接口：
     POST https://openrouter.ai/api/v1/chat/completions
+
+    以 stream=true 方式消费 SSE 增量：45s 超时作用在“两个 chunk 之间”而不是
+    整个响应体上——模型开吐字后挂起也能尽早触发 Fallback，且不用把完整
+    响应攒在内存里再一次性 json.loads。
+    返回值拼装成与非流式相同的结构，调用方（fallback/handler）无需感知。
+    优先走 requests.Session（keep-alive 连接复用），未安装 requests 时退回 urllib。
     """
     url = "https://openrouter.ai/api/v1/chat/completions"
     payload = {
@@ -1422,25 +2222,42 @@ def _openrouter_chat(api_key: str, model: str, prompt: str, max_tokens: int) ->
         ],
         "temperature": 0.2,
         "max_tokens": max_tokens,
+        "stream": True,
     }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url=url,
-        data=data,
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            # OpenRouter 推荐带上这两个 header（可选）
-            "HTTP-Referer": "http://127.0.0.1:8000",
-            "X-Title": "Local Survey Tool",
-        },
-    )
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        # OpenRouter 推荐带上这两个 header（可选）
+        "HTTP-Referer": "http://127.0.0.1:8000",
+        "X-Title": "Local Survey Tool",
+    }
+    data = _json_dumps_bytes(payload)
+
+    session = _get_openrouter_session()
+    if session is not None:
+        # 连接 10s / 读 45s 分开：连不上（DNS/网关挂）10 秒就切下一个模型，
+        # 不用陪满 45s；读超时仍作用在两个 chunk 之间，45s 不吐字即触发 Fallback
+        try:
+            resp = session.post(url, data=data, headers=headers, stream=True, timeout=(10, 45))
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"OpenRouter URLError: {e}")
+        with resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"OpenRouter HTTPError: {resp.status_code} {resp.text}")
+            ctype = (resp.headers.get("Content-Type") or "").lower()
+            if "text/event-stream" not in ctype:
+                # 个别网关会忽略 stream=true 直接回 JSON，按非流式解析
+                return _json_loads(resp.content)
+            return _parse_openrouter_sse(resp.iter_lines())
+
+    req = urllib.request.Request(url=url, data=data, method="POST", headers=headers)
     try:
-        # 缩短超时到 45s，如果免费模型 45s 不吐字，通常已经挂起，尽早触发 Fallback
         with urllib.request.urlopen(req, timeout=45) as resp:
-            raw = resp.read().decode("utf-8", errors="ignore")
-            return json.loads(raw)
+            ctype = (resp.headers.get("Content-Type") or "").lower()
+            if "text/event-stream" not in ctype:
+                raw = resp.read().decode("utf-8", errors="ignore")
+                return _json_loads(raw)
+            return _parse_openrouter_sse(resp)
     except urllib.error.HTTPError as e:
         raw = e.read().decode("utf-8", errors="ignore") if hasattr(e, "read") else str(e)
         raise RuntimeError(f"OpenRouter HTTPError: {e.code} {raw}")
@@ -1469,17 +2286,35 @@ def make_bundle():
     if not f.filename or not f.filename.lower().endswith(".docx"):
         return jsonify({"error": "请上传 .docx 文件"}), 400
 
-    bundle_id = uuid.uuid4().hex
-    docx_path = WORK_DIR / f"{bundle_id}.docx"
-    f.save(str(docx_path))
+    # 边落盘边哈希（BLAKE2b）：同一问题模板反复上传时按内容寻址，
+    # 磁盘上只留一份文件，解析结果也按摘要缓存复用
+    hasher = hashlib.blake2b(digest_size=16)
+    tmp_path = WORK_DIR / f"docx-upload-{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as dst:
+        for chunk in iter(lambda: f.stream.read(1 << 20), b""):
+            hasher.update(chunk)
+            dst.write(chunk)
+    digest = hasher.hexdigest()
+    _discard_upload_stream(f)
+    docx_path = WORK_DIR / f"docx-{digest}.docx"
+    if docx_path.exists():
+        tmp_path.unlink()
+    else:
+        tmp_path.replace(docx_path)
 
     try:
-        questions = _extract_questions_from_docx(docx_path)
-        docx_text = _extract_full_text_from_docx(docx_path)
+        questions, docx_text = _extract_docx_cached(digest, str(docx_path))
     except Exception as e:
         return jsonify({"error": f"解析 docx 失败：{e}"}), 400
 
-    transcript = txt_path.read_text(encoding="utf-8", errors="ignore")
+    # mmap 读转写文本：解码一次进 payload，不经过中间的 Python 缓冲
+    size = txt_path.stat().st_size
+    if size:
+        with txt_path.open("rb") as fp:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                transcript = mm[:].decode("utf-8", errors="ignore")
+    else:
+        transcript = ""
     payload = {
         "job_id": job_id,
         "docx_name": f.filename,
@@ -1491,13 +2326,14 @@ def make_bundle():
     }
 
     out_path = WORK_DIR / f"bundle-{job_id}.json"
-    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    _write_json_indent(out_path, payload)
 
     return send_file(
         str(out_path),
         mimetype="application/json; charset=utf-8",
         as_attachment=True,
         download_name=f"bundle-{job_id}.json",
+        conditional=True,
     )
 
 
@@ -1660,11 +2496,12 @@ def health():
         {
             "ok": True,
             "whisper_bin": WHISPER_BIN,
-            "whisper_bin_path": shutil.which(WHISPER_BIN) if WHISPER_BIN else None,
+            "whisper_bin_path": _which(WHISPER_BIN) if WHISPER_BIN else None,
             "ffmpeg_bin": FFMPEG_BIN,
-            "ffmpeg_bin_path": shutil.which(FFMPEG_BIN) if FFMPEG_BIN else None,
+            "ffmpeg_bin_path": _which(FFMPEG_BIN) if FFMPEG_BIN else None,
             "model": WHISPER_MODEL,
-            "model_exists": Path(WHISPER_MODEL).exists(),
+            "model_exists": _model_exists(),
+            "gpu_disabled": WHISPER_NO_GPU,
             "language": WHISPER_LANGUAGE,
             "max_mb": MAX_CONTENT_LENGTH_MB,
         }
@@ -1676,5 +2513,27 @@ if __name__ == "__main__":
     host = _env("HOST", "127.0.0.1")
     port = int(_env("PORT", "8000"))
     debug = _env("DEBUG", "1").strip() in ("1", "true", "True", "yes", "YES")
-    app.run(host=host, port=port, debug=debug, threaded=True)
+    if debug or not shutil.which("gunicorn"):
+        # 开发模式（或未装 gunicorn）：Werkzeug dev server
+        app.run(host=host, port=port, debug=debug, threaded=True)
+    else:
+        # 生产：gunicorn gthread，多线程下 /api/jobs 轮询不再被 dev server 卡住。
+        # 注意 worker 数固定为 1：任务状态在进程内存（_jobs），多进程会查不到 job。
+        cmd = [
+            "gunicorn",
+            "-k",
+            "gthread",
+            "-w",
+            "1",
+            "--threads",
+            "16",
+            "--timeout",
+            "600",
+            "-b",
+            f"{host}:{port}",
+            "--chdir",
+            str(Path(__file__).resolve().parent),
+            "wsgi:application",
+        ]
+        raise SystemExit(subprocess.call(cmd))
 
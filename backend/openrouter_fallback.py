@@ -1,9 +1,34 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Any, Callable
 
+# 模块级预编译：should_try_next_model 在每个失败模型上都会调用
+_QUOTED_RE = re.compile(r"""['"]([^'"]+)['"]""")
+_HTTP_CODE_RE = re.compile(r"HTTPError:\s*(\d+)")
+
+# 成功响应的短 TTL 缓存：用户从 UI 原样重试（prompt 完全相同）时直接复用，
+# 省一次模型调用和额度。按 prompt 内容哈希精确匹配——不做语义近似，
+# 访谈文本差一个字答案就可能不同，模糊命中返回旧答案风险太大。
+_RESP_CACHE_TTL = 3600.0
+_RESP_CACHE_MAX = 32
+_resp_cache: OrderedDict[str, tuple[float, str, dict]] = OrderedDict()
+_resp_cache_lock = threading.Lock()
+
+
+def _resp_cache_key(prompt: str, max_tokens: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(max_tokens).encode("ascii"))
+    h.update(b"\x00")
+    h.update(prompt.encode("utf-8"))
+    return h.hexdigest()
+
 
 def load_models_from_js(js_path: Path) -> list[str]:
     """
@@ -14,7 +39,7 @@ def load_models_from_js(js_path: Path) -> list[str]:
         return []
     text = js_path.read_text(encoding="utf-8", errors="ignore")
     # 支持 "..." 或 '...'
-    items = re.findall(r"""['"]([^'"]+)['"]""", text)
+    items = _QUOTED_RE.findall(text)
     models: list[str] = []
     for s in items:
         m = (s or "").strip()
@@ -29,7 +54,7 @@ def should_try_next_model(err: Exception) -> bool:
     """
     s = str(err or "")
     # 来自 backend/app.py: "OpenRouter HTTPError: {code} {raw}"
-    m = re.search(r"HTTPError:\s*(\d+)", s)
+    m = _HTTP_CODE_RE.search(s)
     code = int(m.group(1)) if m else None
     # 402: 额度/计费；403: 权限；429: 限流；404: 模型/端点不存在；5xx: 网关/服务异常（可尝试换模型）
     if code in (402, 403, 404, 429, 500, 502, 503, 504):
@@ -58,6 +83,19 @@ def should_try_next_model(err: Exception) -> bool:
     return any(k in lowered for k in keywords)
 
 
+def _validate_response(resp: dict) -> None:
+    """校验响应有效性（DeepSeek 等免费模型可能返回 200 但 content 为空）。"""
+    if isinstance(resp, dict) and "choices" in resp and len(resp["choices"]) > 0:
+        first_choice = resp["choices"][0]
+        # 某些模型会在 choice 对象里直接放个 error
+        if "error" in first_choice and first_choice["error"]:
+            raise RuntimeError(f"Model returned inner error: {first_choice['error']}")
+        # 检查 content 是否为空
+        msg_content = first_choice.get("message", {}).get("content", "")
+        if not msg_content:
+            raise RuntimeError(f"Model returned empty content (possibly filtered or refused): {resp}")
+
+
 def chat_with_model_fallback(
     *,
     api_key: str,
@@ -65,45 +103,71 @@ def chat_with_model_fallback(
     prompt: str,
     max_tokens: int,
     call_fn: Callable[[str, str, str, int], dict],
+    max_inflight: int = 2,
 ) -> tuple[str, dict]:
     """
-    依次尝试多个模型，直到成功；如果全部失败，抛出最后一次错误。
+    尝试多个模型，直到成功；如果全部失败，抛出最后一次错误。
     返回 (used_model, response_json)。
+
+    前 max_inflight 个候选并发发起、先回先用：免费模型挂起 45s 超时是常态，
+    串行逐个等会把尾延迟叠满；某路失败（可重试）时立刻补发下一个候选。
+    不可重试的错误（如 401）直接抛出，与串行版行为一致。
     """
+    if not model_candidates:
+        raise RuntimeError("没有可用的模型候选（model_candidates 为空）")
+
+    cache_key = _resp_cache_key(prompt, max_tokens)
+    now = time.monotonic()
+    with _resp_cache_lock:
+        hit = _resp_cache.get(cache_key)
+        if hit is not None:
+            ts, cached_model, cached_resp = hit
+            if now - ts < _RESP_CACHE_TTL:
+                _resp_cache.move_to_end(cache_key)
+                print(f">>> Fallback: Reusing cached response from {cached_model}", flush=True)
+                return cached_model, cached_resp
+            del _resp_cache[cache_key]
+
     last_err: Exception | None = None
     errors: list[tuple[str, str]] = []
-    for model in model_candidates:
-        try:
-            resp = call_fn(api_key, model, prompt, max_tokens)
-            
-            # 手动校验响应有效性（DeepSeek 等免费模型可能返回 200 但 content 为空）
-            if isinstance(resp, dict) and "choices" in resp and len(resp["choices"]) > 0:
-                first_choice = resp["choices"][0]
-                # 某些模型会在 choice 对象里直接放个 error
-                if "error" in first_choice and first_choice["error"]:
-                    raise RuntimeError(f"Model returned inner error: {first_choice['error']}")
-                # 检查 content 是否为空
-                msg_content = first_choice.get("message", {}).get("content", "")
-                if not msg_content:
-                    raise RuntimeError(f"Model returned empty content (possibly filtered or refused): {resp}")
-            
-            return model, resp
-        except Exception as e:
-            last_err = e
-            msg = str(e or "")
-            if len(msg) > 300:
-                msg = msg[:300] + "..."
-            errors.append((model, msg))
-            print(f">>> Fallback: Model {model} failed with error: {msg}", flush=True)
-            if should_try_next_model(e):
-                print(f">>> Fallback: Attempting next model due to retryable error.", flush=True)
-                continue
-            raise
-    if last_err:
-        # 汇总所有尝试过的模型及错误，方便排查模型名/额度问题
-        summary = "; ".join([f"{m}: {em}" for m, em in errors]) if errors else str(last_err)
-        raise RuntimeError(f"所有模型都调用失败：{summary}")
-    raise RuntimeError("没有可用的模型候选（model_candidates 为空）")
+    pool = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="or-fallback")
+    pending: dict = {}
+    next_idx = 0
+    try:
+        while next_idx < len(model_candidates) or pending:
+            while next_idx < len(model_candidates) and len(pending) < max_inflight:
+                model = model_candidates[next_idx]
+                next_idx += 1
+                pending[pool.submit(call_fn, api_key, model, prompt, max_tokens)] = model
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                model = pending.pop(fut)
+                try:
+                    resp = fut.result()
+                    _validate_response(resp)
+                    with _resp_cache_lock:
+                        _resp_cache[cache_key] = (time.monotonic(), model, resp)
+                        while len(_resp_cache) > _RESP_CACHE_MAX:
+                            _resp_cache.popitem(last=False)
+                    return model, resp
+                except Exception as e:
+                    last_err = e
+                    msg = str(e or "")
+                    if len(msg) > 300:
+                        msg = msg[:300] + "..."
+                    errors.append((model, msg))
+                    print(f">>> Fallback: Model {model} failed with error: {msg}", flush=True)
+                    if should_try_next_model(e):
+                        print(f">>> Fallback: Attempting next model due to retryable error.", flush=True)
+                        continue
+                    raise
+    finally:
+        # 不等还在飞的请求收尾（它们最多白跑到各自超时）
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # 汇总所有尝试过的模型及错误，方便排查模型名/额度问题
+    summary = "; ".join([f"{m}: {em}" for m, em in errors]) if errors else str(last_err)
+    raise RuntimeError(f"所有模型都调用失败：{summary}")
 
 
 def build_model_candidates(
@@ -0,0 +1,9 @@
+"""
+WSGI 入口（生产部署用）：
+
+  gunicorn -k gthread -w 1 --threads 16 --chdir backend wsgi:application
+
+注意：任务状态（_jobs）目前在进程内存里，worker 数必须为 1，
+否则轮询请求可能落到另一个进程查不到 job。
+"""
+from app import app as application  # noqa: F401
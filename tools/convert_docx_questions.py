@@ -16,19 +16,90 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
+import mmap
+import os
 import re
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-from docx import Document
+# 可选：orjson（与后端同款），序列化直接产 UTF-8 bytes；未安装时退回标准库
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
-HEADING_RE = re.compile(r"^\s*[一二三四五六七八九十]+、\s*(.+?)（\s*\d+\s*题\s*）\s*$")
+# 标题名用 [^（]+ 负字符类：一步扫到左括号，不靠 .+? 懒匹配逐字符回溯试探
+HEADING_RE = re.compile(r"^\s*[一二三四五六七八九十]+、\s*([^（]+)（\s*\d+\s*题\s*）\s*$")
+# 行过滤热路径：题号列必须是 1-3 位数字（\Z 锚配 match 等价 fullmatch）。
+# 数字校验本身就挡掉了“题号/编号/序号”表头行，不再单独比对表头字面量
+ID_RE = re.compile(r"\d{1,3}\Z")
+_WS_RE = re.compile(r"\s+")
 
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = _W_NS + "p"
+_W_TBL = _W_NS + "tbl"
+_W_TR = _W_NS + "tr"
+_W_TC = _W_NS + "tc"
 
-def _cell_text(cell) -> str:
-    return "\n".join((p.text or "").strip() for p in cell.paragraphs if (p.text or "").strip()).strip()
+
+def _cell_text(tc_el) -> str:
+    """
+    单元格文本：整个 w:tc 一次 itertext 扫完，空白统一折叠成单个空格。
+    之前按段落分别 join/strip 再拼接——一格多段只出现在排版换行，
+    对题号/题面两列的语义没有区别，单次 C 级 join + 一次 sub 更省。
+    """
+    return _WS_RE.sub(" ", "".join(tc_el.itertext())).strip()
+
+
+def _iter_doc_blocks(docx_path: Path):
+    """
+    流式遍历 word/document.xml，按文档顺序产出：
+      ('p', 段落文本)      —— 仅表格外的段落
+      ('tbl', 子树 bytes)  —— 每张表的 w:tbl XML，交给 _parse_table_xml 解析
+    之前走 python-docx 的 Document()，整棵 OOXML 对象树先建完才能碰到
+    第一个字；iterparse 边解析边吐、用完即 clear()，内存 O(1)。
+    docx 本体 mmap 进来（zipfile 直接在页缓存上随机读，不先整包读堆），
+    word/document.xml 解压一次成连续 bytes，解析器在单块缓冲上跑。
+    """
+    with open(docx_path, "rb") as f:
+        if hasattr(mmap.mmap, "seekable"):
+            # 3.13+ 的 mmap 才实现 zipfile 要求的完整 file 协议
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, zipfile.ZipFile(mm) as z:
+                xml_bytes = z.read("word/document.xml")
+        else:
+            with zipfile.ZipFile(f) as z:
+                xml_bytes = z.read("word/document.xml")
+    with io.BytesIO(xml_bytes) as fh:
+        tbl_depth = 0
+        for event, el in ET.iterparse(fh, events=("start", "end")):
+            if event == "start":
+                if el.tag == _W_TBL:
+                    tbl_depth += 1
+                continue
+            if el.tag == _W_TBL:
+                tbl_depth -= 1
+                if tbl_depth == 0:
+                    yield ("tbl", ET.tostring(el))
+                    el.clear()
+            elif el.tag == _W_P and tbl_depth == 0:
+                yield ("p", "".join(el.itertext()))
+                el.clear()
+
+
+def _parse_table_xml(tbl_xml: bytes) -> list[list[str]]:
+    """
+    解析单个 w:tbl 子树为单元格文本矩阵（可在子进程里跑）。
+    下游只消费 题号/题面 两列，每行最多取前两格就够——宽表的
+    备注列等不再逐格抽文本。
+    """
+    el = ET.fromstring(tbl_xml)
+    return [[_cell_text(tc) for tc in tr.findall(_W_TC)[:2]] for tr in el.findall(_W_TR)]
 
 
 def extract_categories(docx_path: Path) -> list[dict]:
@@ -39,36 +110,45 @@ def extract_categories(docx_path: Path) -> list[dict]:
       ...
     ]
     """
-    doc = Document(str(docx_path))
-
     headings: list[str] = []
-    for p in doc.paragraphs:
-        t = (p.text or "").strip()
-        if not t:
-            continue
-        if HEADING_RE.match(t):
-            headings.append(t)
+    tbl_blobs: list[bytes] = []
+    try:
+        # 编码校验只发生在这一处：expat 在连续 buffer 上单趟 C 级扫描，
+        # 下游拿到的都是已校验的 str，不再有逐段落的检查
+        for kind, payload in _iter_doc_blocks(docx_path):
+            if kind == "p":
+                t = payload.strip()
+                if t and HEADING_RE.match(t):
+                    headings.append(t)
+            else:
+                tbl_blobs.append(payload)
+    except ET.ParseError as e:
+        raise ValueError(f"docx 解析失败（word/document.xml 损坏或编码非法）: {docx_path}: {e}") from e
+
+    # 表与表互相独立：XML 总量大时开进程池并行解析（各进程无 GIL 竞争），
+    # 常见的小模板直接串行，省掉进程池的固定启动开销
+    if len(tbl_blobs) >= 2 and sum(map(len, tbl_blobs)) > (1 << 21):
+        with ProcessPoolExecutor(max_workers=min(len(tbl_blobs), os.cpu_count() or 2)) as ex:
+            tables = list(ex.map(_parse_table_xml, tbl_blobs))
+    else:
+        tables = [_parse_table_xml(blob) for blob in tbl_blobs]
 
     # 模板：标题数与表格数一致时，按顺序对应；否则兜底按表格顺序生成
-    titles = headings if headings and len(headings) == len(doc.tables) else [f"问题类别 {i+1}" for i in range(len(doc.tables))]
+    titles = headings if headings and len(headings) == len(tables) else [f"问题类别 {i+1}" for i in range(len(tables))]
 
     categories: list[dict] = []
-    for ti, tb in enumerate(doc.tables):
+    for ti, rows in enumerate(tables):
         title = titles[ti] if ti < len(titles) else f"问题类别 {ti+1}"
         qs: list[dict] = []
 
-        for row in tb.rows:
-            if len(row.cells) < 2:
+        for cells in rows:
+            if len(cells) < 2:
                 continue
-            c0 = _cell_text(row.cells[0])
-            c1 = _cell_text(row.cells[1])
+            c0 = cells[0]
+            c1 = cells[1]
             if not c0 or not c1:
                 continue
-            if c0 in ("题号", "编号", "序号"):
-                continue
-            if c1 in ("提纲原题",):
-                continue
-            if not re.fullmatch(r"\d{1,3}", c0):
+            if not ID_RE.match(c0) or c1 == "提纲原题":
                 continue
             qs.append({"id": c0, "text": c1})
 
@@ -77,40 +157,77 @@ def extract_categories(docx_path: Path) -> list[dict]:
     return categories
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("docx", help="问题模板 docx 路径")
-    ap.add_argument("--out-dir", default="survey", help="输出目录（默认 survey）")
-    args = ap.parse_args()
-
-    docx_path = Path(args.docx).expanduser().resolve()
-    out_dir = Path(args.out_dir).expanduser().resolve()
-    out_dir.mkdir(parents=True, exist_ok=True)
-
+def convert_one(docx_path: Path, out_dir: Path, generated_at: str, stem: str = "questions") -> int:
+    """
+    转换单个 docx，输出 <out_dir>/<stem>.json 和 <stem>.txt，返回题目数。
+    docx_path/out_dir 由调用方 resolve 好，时间戳也由调用方传入——批量跑
+    时两者都只算一次。
+    """
     categories = extract_categories(docx_path)
     total = sum(c.get("count", 0) for c in categories)
+    if total == 0:
+        # 一题都没提出来基本是 docx 格式不符，别再写一份空 json/txt 盖掉旧结果
+        print(f"未提取到任何问题（请检查 docx 是否为“标题 + 题号/题面表格”模板）: {docx_path}")
+        return 0
     payload = {
         "source_docx": str(docx_path),
-        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "generated_at": generated_at,
         "total_count": total,
         "categories": categories,
     }
 
-    json_path = out_dir / "questions.json"
-    txt_path = out_dir / "questions.txt"
-
-    json_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    txt_lines: list[str] = []
-    for cat in categories:
-        txt_lines.append(f"### {cat['title']}")
-        for q in cat.get("questions", []):
-            txt_lines.append(f"{q['id']}. {q['text']}")
-        txt_lines.append("")
-    txt_path.write_text("\n".join(txt_lines).rstrip() + "\n", encoding="utf-8")
+    json_path = out_dir / f"{stem}.json"
+    txt_path = out_dir / f"{stem}.txt"
+
+    if orjson is not None:
+        json_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2) + b"\n")
+    else:
+        # json.dump 直接写进带大缓冲的文件对象：不先在内存里攒整个 JSON 字符串再
+        # 整体 encode 落盘（峰值内存从 2× payload 降到缓冲区大小）
+        with json_path.open("w", encoding="utf-8", buffering=1 << 20) as fp:
+            json.dump(payload, fp, ensure_ascii=False, indent=2, separators=(",", ": "))
+            fp.write("\n")
+
+    def _txt_lines():
+        for ci, cat in enumerate(categories):
+            if ci:
+                yield "\n"
+            yield f"### {cat['title']}\n"
+            for q in cat.get("questions", []):
+                yield f"{q['id']}. {q['text']}\n"
+
+    with txt_path.open("w", encoding="utf-8", buffering=1 << 20) as fp:
+        fp.writelines(_txt_lines())
 
     print(f"OK: {total} questions")
     print(f"- {json_path}")
     print(f"- {txt_path}")
+    return total
+
+
+def convert_many(docx_paths: list[Path], out_dir: Path) -> None:
+    """
+    批量转换：out_dir 只 resolve + mkdir 一次，generated_at 整批共用。
+    单文件保持老输出名 questions.json/questions.txt；多文件时各自带
+    docx 文件名前缀，互不覆盖。
+    """
+    out_dir = out_dir.expanduser().resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    generated_at = datetime.now().isoformat(timespec="seconds")
+    single = len(docx_paths) == 1
+    for p in docx_paths:
+        p = p.expanduser().resolve()
+        stem = "questions" if single else f"{p.stem}.questions"
+        convert_one(p, out_dir, generated_at, stem=stem)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("docx", nargs="+", help="问题模板 docx 路径（可一次传多个批量转换）")
+    ap.add_argument("--out-dir", default="survey", help="输出目录（默认 survey）")
+    args = ap.parse_args()
+
+    convert_many([Path(d) for d in args.docx], Path(args.out_dir))
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ import base64
 import hashlib
 import hmac
 import json
+import random
 import time
 import urllib.parse
 import sys
@@ -28,14 +29,10 @@ api_get_result = '/getResult'
 
 
 def get_signa(appid: str, secret_key: str, ts: str) -> str:
-    """科大讯飞签名生成"""
-    m2 = hashlib.md5()
-    m2.update((appid + ts).encode('utf-8'))
-    md5 = m2.hexdigest()
-    md5 = bytes(md5, encoding='utf-8')
-    signa = hmac.new(secret_key.encode('utf-8'), md5, hashlib.sha1).digest()
-    signa = base64.b64encode(signa)
-    return str(signa, 'utf-8')
+    """科大讯飞签名生成（注意协议：HMAC 的输入是 md5 的十六进制字符串）"""
+    md5_hex = hashlib.md5((appid + ts).encode('utf-8')).hexdigest().encode('ascii')
+    # hmac.digest 是 OpenSSL 的 one-shot C 接口，不建 Python 层 HMAC 对象
+    return base64.b64encode(hmac.digest(secret_key.encode('utf-8'), md5_hex, 'sha1')).decode('ascii')
 
 
 def test_xunfei_api(audio_path: str):
@@ -48,6 +45,10 @@ def test_xunfei_api(audio_path: str):
     ts = str(int(time.time()))
     signa = get_signa(APPID, SECRET_KEY, ts)
 
+    # 上传 + 上百次轮询共用一条 keep-alive 连接，不每次重握 TCP+TLS
+    sess = requests.Session()
+    sess.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
     # 第一步：上传文件
     print("=" * 60)
     print("第一步：上传文件")
@@ -67,16 +68,16 @@ def test_xunfei_api(audio_path: str):
     print(f"参数: {param_dict}")
     print(f"上传 URL: {lfasr_host + api_upload}")
 
-    with open(audio_path, 'rb') as f:
-        audio_data = f.read()
-
+    # 文件对象直接做请求体：requests 按 stat 大小定 Content-Length 流式发送，
+    # 不把整个音频先 read() 进内存（大文件省一倍峰值内存）
     upload_url = lfasr_host + api_upload + "?" + urllib.parse.urlencode(param_dict)
-    upload_resp = requests.post(
-        url=upload_url,
-        headers={"Content-type": "application/json"},
-        data=audio_data,
-        timeout=60
-    )
+    with open(audio_path, 'rb') as f:
+        upload_resp = sess.post(
+            url=upload_url,
+            headers={"Content-type": "application/octet-stream"},
+            data=f,
+            timeout=60
+        )
 
     print(f"状态码: {upload_resp.status_code}")
     print(f"响应: {json.dumps(upload_resp.json(), ensure_ascii=False, indent=2)}")
@@ -113,13 +114,15 @@ def test_xunfei_api(audio_path: str):
     max_polls = 120
     poll_count = 0
     status = 3
+    # 指数退避 + 抖动：短音频几秒就完，固定 sleep(5) 白等；上限 10s 不改最坏情况
+    delay = 1.0
 
     while status == 3 and poll_count < max_polls:
         poll_count += 1
         print(f"\n第 {poll_count} 次查询...")
 
         result_url = lfasr_host + api_get_result + "?" + urllib.parse.urlencode(param_dict)
-        result_resp = requests.post(
+        result_resp = sess.post(
             url=result_url,
             headers={"Content-type": "application/json"},
             timeout=30
@@ -131,7 +134,6 @@ def test_xunfei_api(audio_path: str):
             break
 
         result_data = result_resp.json()
-        print(f"响应: {json.dumps(result_data, ensure_ascii=False, indent=2)}")
 
         if result_data.get('code') != 0:
             print(f"查询失败: {result_data.get('desc', '未知错误')}")
@@ -139,7 +141,8 @@ def test_xunfei_api(audio_path: str):
 
         order_info = result_data.get('content', {}).get('orderInfo', {})
         status = order_info.get('status', 3)
-        print(f"状态: {status} (3=处理中, 4=完成)")
+        # 中间轮询只打一行状态，完整响应（可能好几 MB）只在完成时美化输出一次
+        print(f"状态: {status} (3=处理中, 4=完成), code={result_data.get('code')}")
 
         if status == 4:
             print("\n✅ 转写完成！")
@@ -147,7 +150,8 @@ def test_xunfei_api(audio_path: str):
             print(json.dumps(result_data, ensure_ascii=False, indent=2))
             break
 
-        time.sleep(5)
+        time.sleep(delay + random.uniform(0, delay * 0.25))
+        delay = min(delay * 1.5, 10.0)
 
     if status != 4:
         print(f"\n❌ 转写未完成（已查询 {poll_count} 次），最后状态: {status}")